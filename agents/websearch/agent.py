@@ -1,8 +1,16 @@
+import asyncio
+import contextvars
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import yaml
 
+from core.tracing import span
+
+from .extraction import get_extraction_pool
+from .health import get_domain_health
 from .tools import *
 from .workers import *
 
@@ -16,6 +24,9 @@ class WebSearchAgent:
     websearch_conversation = []  # Tracked conversation between user and agent
     agent_config = None  # tool/agent system prompts
     agent_mode = None  # Agent's operating mode
+    speculation = None  # Conditional mode speculation level ("off", "query", "search")
+    decision = None  # Conditional mode decision tools ("separate" or "fused")
+    search_deadline = None  # Seconds a whole search may take (0 for no deadline)
 
     def __init__(self, agent_mode="explicit"):
         """
@@ -27,6 +38,7 @@ class WebSearchAgent:
         Agent Modes:
             explicit: When a user query is passed to the agent, it will add context via web search. (default)
             conditional: When a user query is passed to the agent, it will evaluate if a web search is needed and decide whether to add context via web search or not.
+            snippet: Like explicit, but the context is only the search result titles and snippets, no pages are scraped (falls back to scraping when the snippets are too short).
 
         Config:
             agent_config.yaml: Configuration file that allows modification of all settings besides agent operating mode
@@ -44,6 +56,12 @@ class WebSearchAgent:
         self.name = self.agent_config["agent"]["name"]
         self.agent_mode = self.agent_config["agent"]["mode"]
         self.agent_message = self.agent_config["agent"]["agent_message"]
+        self.speculation = self.agent_config["agent"].get("speculation", "off")
+        self.decision = self.agent_config["agent"].get("decision", "separate")
+        self.search_deadline = self.agent_config["agent"].get("search_deadline", 0)
+        self.query_mode = self.agent_config["agent"].get("query_mode", "single")
+        # Start the extraction workers now so the first search does not wait for them
+        get_extraction_pool(self.agent_config)
         logging.warning(f"[+] WebSearchAgent: Loaded agent in mode {self.agent_mode}.")
 
     def set_agent_mode(self, agent_mode):
@@ -56,6 +74,7 @@ class WebSearchAgent:
         Agent Modes:
             explicit: When a user query is passed to the agent, it will add context via web search. (default)
             conditional: When a user query is passed to the agent, it will evaluate if a web search is needed and decide whether to add context via web search or not.
+            snippet: Like explicit, but the context is only the search result titles and snippets, no pages are scraped (falls back to scraping when the snippets are too short).
         """
 
         if "explicit" in agent_mode.lower():
@@ -64,6 +83,39 @@ class WebSearchAgent:
         elif "conditional" in agent_mode.lower():
             self.agent_mode = "conditional"
             logging.warning('[+] WebSearchAgent: Set agent mode to "conditional"')
+        elif "snippet" in agent_mode.lower():
+            self.agent_mode = "snippet"
+            logging.warning('[+] WebSearchAgent: Set agent mode to "snippet"')
+
+    def active_tools(self):
+        """
+        Accessor function for the tools the agent's mode, decision and query mode call on every search
+
+        Tools only called as a fallback, when another tool's output cannot be parsed, are left out.
+
+        Returns:
+            tools (list): Tool names, keys of `tools` in the agent config
+        """
+        if self.agent_mode == "conditional" and self.decision == "fused":
+            return ["decide_and_query"]
+        tools = [
+            "generate_queries" if self.query_mode == "fanout" else "generate_query"
+        ]
+        if self.agent_mode == "conditional":
+            tools.insert(0, "decide_to_search")
+        return tools
+
+    def domain_health_report(self):
+        """
+        Accessor function for the per-domain scrape statistics
+
+        Returns:
+            report (list): One dictionary per tracked domain, see `DomainHealth.report` (None when domain health is disabled)
+        """
+        domain_health = get_domain_health(self.agent_config)
+        if domain_health is None:
+            return None
+        return domain_health.report()
 
     def search(self, user_prompt):
         """
@@ -77,24 +129,288 @@ class WebSearchAgent:
             query (str): A new query string with the added web context
             urls (list): The list of URL the source used for context (empty list if no context added)
         """
+        deadline = self._deadline()
 
         # If agent is in "conditional mode", perform agentic assessment to determine if a search is necessary with `tools.decide_to_search`
-        if self.agent_mode == "conditional":
-            logging.warning(f"[+] WebSearchAgent: Running decide_to_search tool")
-            if not decide_to_search(user_prompt, self.agent_config):
+        if self.agent_mode == "conditional" and self.decision == "fused":
+            logging.warning("[+] WebSearchAgent: Running decide_and_query tool")
+            search_needed, search_query = decide_and_query(
+                user_prompt, self.agent_config
+            )
+            if not search_needed:
+                logging.warning(f"[+] WebSearchAgent: Exiting...")
+                return (False, "", [])
+
+            logging.critical("[+] Running WebSearch agent...")
+            logging.warning("[+] WebSearchAgent Running searxng_search worker")
+            web_contexts = searxng_search(
+                search_query, self.agent_config, deadline=deadline
+            )
+        elif self.agent_mode == "conditional" and self.speculation in (
+            "query",
+            "search",
+        ):
+            search_needed, search_query, web_contexts = self._speculative_search(
+                user_prompt, deadline
+            )
+            if not search_needed:
+                logging.warning(f"[+] WebSearchAgent: Exiting...")
+                return (False, "", [])
+        else:
+            if self.agent_mode == "conditional":
+                logging.warning(f"[+] WebSearchAgent: Running decide_to_search tool")
+                if not decide_to_search(user_prompt, self.agent_config):
+                    logging.warning(f"[+] WebSearchAgent: Exiting...")
+                    return (False, "", [])
+
+            # Run the WebSearch agent
+            logging.critical("[+] Running WebSearch agent...")
+
+            # Generate search query
+            search_query = self._generate_query(user_prompt)
+
+            # Run search query, return content from top pages (or only their snippets)
+            if self.agent_mode == "snippet":
+                web_contexts = self._snippet_search(search_query, deadline)
+            else:
+                logging.warning("[+] WebSearchAgent Running searxng_search worker")
+                web_contexts = searxng_search(
+                    search_query, self.agent_config, deadline=deadline
+                )
+
+        return self._build_query(user_prompt, search_query, web_contexts)
+
+    async def async_search(self, user_prompt):
+        """
+        Async counterpart of `search`, running all network I/O on the running event loop
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent (usually the most recent input from the user)
+
+        Returns:
+            result (bool): Boolean expression stating whether the agent added context or not
+            query (str): A new query string with the added web context
+            urls (list): The list of URL the source used for context (empty list if no context added)
+        """
+        deadline = self._deadline()
+
+        if self.agent_mode == "conditional" and self.decision == "fused":
+            logging.warning("[+] WebSearchAgent: Running decide_and_query tool")
+            search_needed, search_query = await async_decide_and_query(
+                user_prompt, self.agent_config
+            )
+            if not search_needed:
+                logging.warning(f"[+] WebSearchAgent: Exiting...")
+                return (False, "", [])
+
+            logging.critical("[+] Running WebSearch agent...")
+            logging.warning("[+] WebSearchAgent Running searxng_search worker")
+            web_contexts = await async_searxng_search(
+                search_query, self.agent_config, deadline=deadline
+            )
+        elif self.agent_mode == "conditional" and self.speculation in (
+            "query",
+            "search",
+        ):
+            logging.warning(
+                f'[+] WebSearchAgent: Running decide_to_search and query_generator tools speculatively ("{self.speculation}")'
+            )
+            decision = asyncio.create_task(
+                async_decide_to_search(user_prompt, self.agent_config)
+            )
+            if self.speculation == "search":
+                search = asyncio.create_task(
+                    self._async_query_and_search(user_prompt, deadline)
+                )
+            else:
+                search = asyncio.create_task(self._async_generate_query(user_prompt))
+            try:
+                search_needed = await decision
+            except BaseException:
+                search.cancel()
+                raise
+            if not search_needed:
+                logging.warning(
+                    "[+] WebSearchAgent: Discarding speculative query, no search needed"
+                )
+                search.cancel()
                 logging.warning(f"[+] WebSearchAgent: Exiting...")
                 return (False, "", [])
 
-        # Run the WebSearch agent
-        logging.critical("[+] Running WebSearch agent...")
+            logging.critical("[+] Running WebSearch agent...")
+            if self.speculation == "search":
+                search_query, web_contexts = await search
+            else:
+                search_query = await search
+                logging.warning("[+] WebSearchAgent Running searxng_search worker")
+                web_contexts = await async_searxng_search(
+                    search_query, self.agent_config, deadline=deadline
+                )
+        else:
+            if self.agent_mode == "conditional":
+                logging.warning(f"[+] WebSearchAgent: Running decide_to_search tool")
+                if not await async_decide_to_search(user_prompt, self.agent_config):
+                    logging.warning(f"[+] WebSearchAgent: Exiting...")
+                    return (False, "", [])
+
+            logging.critical("[+] Running WebSearch agent...")
+            search_query = await self._async_generate_query(user_prompt)
+            if self.agent_mode == "snippet":
+                web_contexts = await self._async_snippet_search(search_query, deadline)
+            else:
+                logging.warning("[+] WebSearchAgent Running searxng_search worker")
+                web_contexts = await async_searxng_search(
+                    search_query, self.agent_config, deadline=deadline
+                )
+
+        # Passage ranking and prompt assembly are CPU-bound, keep them off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            contextvars.copy_context().run,
+            self._build_query,
+            user_prompt,
+            search_query,
+            web_contexts,
+        )
+
+    def _generate_query(self, user_prompt):
+        """
+        Runs the query tool of the configured query mode
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
+
+        Returns:
+            search_query (str|list): The generated search query, or the alternative queries in "fanout" mode
+        """
+        if self.query_mode == "fanout":
+            logging.warning("[+] WebSearchAgent: Running generate_queries tool")
+            return generate_queries(user_prompt, self.agent_config)
+        logging.warning("[+] WebSearchAgent: Running query_generator tool")
+        return generate_query(user_prompt, self.agent_config)
+
+    async def _async_generate_query(self, user_prompt):
+        """
+        Async counterpart of `_generate_query`
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
 
-        # Generate search query
+        Returns:
+            search_query (str|list): The generated search query, or the alternative queries in "fanout" mode
+        """
+        if self.query_mode == "fanout":
+            logging.warning("[+] WebSearchAgent: Running generate_queries tool")
+            return await async_generate_queries(user_prompt, self.agent_config)
         logging.warning("[+] WebSearchAgent: Running query_generator tool")
-        search_query = generate_query(user_prompt, self.agent_config)
+        return await async_generate_query(user_prompt, self.agent_config)
+
+    def _deadline(self):
+        """
+        Accessor function for the deadline of a search starting now
+
+        Returns:
+            deadline (float): The `time.monotonic()` time the search must finish by (None for no deadline)
+        """
+        if not self.search_deadline:
+            return None
+        return time.monotonic() + self.search_deadline
+
+    def _snippet_search(self, search_query, deadline=None):
+        """
+        Runs the search for "snippet" mode, escalating to full page scraping when the snippets are too short
+
+        Args:
+            search_query (str|list): The generated search query (or fan-out queries)
+            deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+        Returns:
+            web_contexts (list): Snippet contexts, or scraped page contexts if the search escalated
+        """
+        logging.warning("[+] WebSearchAgent Running search_snippets worker")
+        web_contexts, results = search_snippets(
+            search_query, self.agent_config, deadline
+        )
+        if self._snippets_too_short(web_contexts):
+            logging.warning(
+                "[+] WebSearchAgent: Snippets too short, running searxng_search worker"
+            )
+            return searxng_search(
+                search_query, self.agent_config, results=results, deadline=deadline
+            )
+        return web_contexts
+
+    async def _async_snippet_search(self, search_query, deadline=None):
+        """
+        Async counterpart of `_snippet_search`
+
+        Args:
+            search_query (str|list): The generated search query (or fan-out queries)
+            deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+        Returns:
+            web_contexts (list): Snippet contexts, or scraped page contexts if the search escalated
+        """
+        logging.warning("[+] WebSearchAgent Running search_snippets worker")
+        web_contexts, results = await async_search_snippets(
+            search_query, self.agent_config, deadline
+        )
+        if self._snippets_too_short(web_contexts):
+            logging.warning(
+                "[+] WebSearchAgent: Snippets too short, running searxng_search worker"
+            )
+            return await async_searxng_search(
+                search_query, self.agent_config, results=results, deadline=deadline
+            )
+        return web_contexts
+
+    def _snippets_too_short(self, web_contexts):
+        """
+        Checks snippet contexts against the configured escalation threshold
+
+        Args:
+            web_contexts (list): The snippet contexts
+
+        Returns:
+            too_short (bool): True if the total snippet length is under `min_snippet_chars`
+        """
+        min_snippet_chars = self.agent_config["workers"]["search_snippets"][
+            "min_snippet_chars"
+        ]
+        return (
+            sum(len(web_data["context"]) for web_data in web_contexts)
+            < min_snippet_chars
+        )
+
+    def _build_query(self, user_prompt, search_query, web_contexts):
+        """
+        Assembles the new user query from the scraped web context
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
+            search_query (str|list): The generated search query (or fan-out queries)
+            web_contexts (list): The `searxng_search` results
+
+        Returns:
+            result (bool): Boolean expression stating whether the agent added context or not
+            query (str): A new query string with the added web context
+            urls (list): The list of URL the source used for context (empty list if no context added)
+        """
+        if not web_contexts:
+            logging.warning("[+] WebSearchAgent: No pages could be scraped, exiting...")
+            return (False, "", [])
+
+        if isinstance(search_query, list):
+            # Terms from every fan-out query count towards passage relevance
+            search_query = " ".join(search_query)
+        if self.agent_config["workers"].get("select_passages", {}).get("enabled"):
+            logging.warning("[+] WebSearchAgent: Running select_passages worker")
+            with span("select_passages"):
+                web_contexts = select_passages(
+                    web_contexts, user_prompt, search_query, self.agent_config
+                )
 
-        # Run search query, return content from top pages
-        logging.warning("[+] WebSearchAgent Running searxng_search worker")
-        web_contexts = searxng_search(search_query, self.agent_config)
         web_urls = []
         query = f"{self.agent_message}\n\n"
         for i, web_data in enumerate(web_contexts):
@@ -109,6 +425,106 @@ class WebSearchAgent:
         logging.warning(f"[+] WebSearchAgent: Exiting.")
         return True, query, web_urls
 
+    async def _async_query_and_search(self, user_prompt, deadline=None):
+        """
+        Async counterpart of `_query_and_search`
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
+            deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+        Returns:
+            search_query (str|list): The generated search query (or fan-out queries)
+            web_contexts (list): The `searxng_search` results for the generated query
+        """
+        search_query = await self._async_generate_query(user_prompt)
+        logging.warning("[+] WebSearchAgent Running searxng_search worker")
+        return search_query, await async_searxng_search(
+            search_query, self.agent_config, deadline=deadline
+        )
+
+    def _speculative_search(self, user_prompt, deadline=None):
+        """
+        Runs `decide_to_search` and `generate_query` at the same time instead of one after the other
+
+        With speculation "search", the SearXNG search and page scraping also start as soon as the query is
+        generated, before the decision is known. Work for a False decision is thrown away (still-running
+        calls are abandoned, not interrupted).
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
+            deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+        Returns:
+            search_needed (bool): The `decide_to_search` result
+            search_query (str|list): The generated search query or fan-out queries (None if no search was needed)
+            web_contexts (list): The `searxng_search` results (None if no search was needed)
+        """
+        logging.warning(
+            f'[+] WebSearchAgent: Running decide_to_search and query_generator tools speculatively ("{self.speculation}")'
+        )
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            # Copies of the caller's context keep the tools' spans in the caller's trace
+            decision = executor.submit(
+                contextvars.copy_context().run,
+                decide_to_search,
+                user_prompt,
+                self.agent_config,
+            )
+            if self.speculation == "search":
+                search = executor.submit(
+                    contextvars.copy_context().run,
+                    self._query_and_search,
+                    user_prompt,
+                    deadline,
+                )
+            else:
+                search = executor.submit(
+                    contextvars.copy_context().run,
+                    self._generate_query,
+                    user_prompt,
+                )
+
+            if not decision.result():
+                logging.warning(
+                    "[+] WebSearchAgent: Discarding speculative query, no search needed"
+                )
+                search.cancel()
+                return False, None, None
+
+            logging.critical("[+] Running WebSearch agent...")
+            if self.speculation == "search":
+                return (True, *search.result())
+
+            search_query = search.result()
+            logging.warning("[+] WebSearchAgent Running searxng_search worker")
+            return (
+                True,
+                search_query,
+                searxng_search(search_query, self.agent_config, deadline=deadline),
+            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _query_and_search(self, user_prompt, deadline=None):
+        """
+        Helper for speculation "search" that generates a query and immediately runs it
+
+        Args:
+            user_prompt (str): The query to the LM that is being run through the search agent
+            deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+        Returns:
+            search_query (str|list): The generated search query (or fan-out queries)
+            web_contexts (list): The `searxng_search` results for the generated query
+        """
+        search_query = self._generate_query(user_prompt)
+        logging.warning("[+] WebSearchAgent Running searxng_search worker")
+        return search_query, searxng_search(
+            search_query, self.agent_config, deadline=deadline
+        )
+
 
 if __name__ == "__main__":
     """Local test of the WebSearch agent"""
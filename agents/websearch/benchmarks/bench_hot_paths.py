@@ -0,0 +1,272 @@
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import yaml
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root
+from agents.websearch.agent import WebSearchAgent
+from agents.websearch.workers import (
+    _extract_page,
+    _parse_search_html,
+    _parse_search_html_lxml,
+    _parse_search_json,
+    _trafilatura_config,
+)
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+CORPUS_DIR = BENCHMARK_DIR / "corpus"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+DEFAULT_CONFIG = BENCHMARK_DIR.parent / "agent_config.default"
+
+
+def load_corpus():
+    """
+    Loads the saved SearXNG pages and article pages
+
+    Returns:
+        searxng_pages (dict): {query name: {"html": str, "json": str}}
+        articles (dict): {article name: HTML str}
+    """
+    searxng_pages = {}
+    for page in sorted(CORPUS_DIR.glob("searxng_*.html")):
+        json_page = page.with_suffix(".json")
+        searxng_pages[page.stem] = {
+            "html": page.read_text(encoding="utf-8"),
+            "json": (
+                json_page.read_text(encoding="utf-8") if json_page.exists() else None
+            ),
+        }
+    articles = {
+        page.stem: page.read_text(encoding="utf-8")
+        for page in sorted(CORPUS_DIR.glob("article_*.html"))
+    }
+    return searxng_pages, articles
+
+
+def build_cases(agent_config, num_search_results):
+    """
+    Builds the benchmark cases, one callable per hot path and corpus page
+
+    Args:
+        agent_config (dict): The default agent configuration
+        num_search_results (int): The number of results to parse from each SearXNG page
+
+    Returns:
+        cases (list): (case name, func) tuples, each func runs one operation
+    """
+    searxng_pages, articles = load_corpus()
+    trafilatura_config = _trafilatura_config(agent_config)
+    cases = []
+
+    for name, page in searxng_pages.items():
+        cases.append(
+            (
+                f"parse_html_bs4/{name}",
+                lambda html=page["html"]: _parse_search_html(html, num_search_results),
+            )
+        )
+        cases.append(
+            (
+                f"parse_html_lxml/{name}",
+                lambda html=page["html"]: _parse_search_html_lxml(
+                    html, num_search_results
+                ),
+            )
+        )
+        if page["json"] is not None:
+            cases.append(
+                (
+                    f"parse_json/{name}",
+                    lambda text=page["json"]: _parse_search_json(
+                        text, num_search_results
+                    ),
+                )
+            )
+
+    # `_scrape_webpage` builds a fresh trafilatura config (a deepcopy) for every page it scrapes
+    cases.append(("trafilatura_config", lambda: _trafilatura_config(agent_config)))
+    for name, html in articles.items():
+        cases.append(
+            (
+                f"extract/{name}",
+                lambda html=html: _extract_page(html, trafilatura_config),
+            )
+        )
+
+    # Prompt assembly (including passage selection when enabled) over the extracted articles
+    agent = WebSearchAgent.__new__(WebSearchAgent)
+    agent.agent_config = agent_config
+    agent.agent_message = agent_config["agent"]["agent_message"]
+    web_contexts = [
+        {
+            "name": name,
+            "url": f"https://example.com/{name}",
+            "context": _extract_page(html, trafilatura_config) or "",
+        }
+        for name, html in articles.items()
+    ]
+    user_prompt = "What are the latest Rust language features?"
+    search_query = "latest rust language features"
+    cases.append(
+        (
+            "build_query",
+            lambda: agent._build_query(user_prompt, search_query, web_contexts),
+        )
+    )
+    return cases
+
+
+def run_case(func, iterations, min_seconds):
+    """
+    Times one benchmark case, then measures its peak memory in a separate untimed run
+
+    Args:
+        func (func): The operation to benchmark
+        iterations (int): The minimum number of timed runs
+        min_seconds (float): The minimum total timed duration, more runs are added until it is reached
+
+    Returns:
+        result (dict): Throughput, latency percentiles and peak traced memory of format {"runs": int, "ops_per_s": float, "p50_ms": float, "p95_ms": float, "p99_ms": float, "peak_kib": float}
+    """
+    func()  # warm-up
+    times = []
+    started = time.perf_counter()
+    while len(times) < iterations or time.perf_counter() - started < min_seconds:
+        start_time = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start_time)
+
+    # tracemalloc slows allocations down, so memory is measured outside the timed runs
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    percentiles = statistics.quantiles(times, n=100, method="inclusive")
+    return {
+        "runs": len(times),
+        "ops_per_s": len(times) / sum(times),
+        "p50_ms": 1000 * statistics.median(times),
+        "p95_ms": 1000 * percentiles[94],
+        "p99_ms": 1000 * percentiles[98],
+        "peak_kib": peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares results against a saved baseline
+
+    Args:
+        results (dict): {case name: result} for this run
+        baseline (dict): {case name: result} from the baseline file
+        tolerance (float): Allowed relative slowdown of the median (e.g. 0.15 for 15%)
+
+    Returns:
+        regressions (list): The names of cases whose median got slower than the tolerance allows
+    """
+    regressions = []
+    print(f"\n{'case':58} {'p50 ms':>9} {'baseline':>9} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:58} {result['p50_ms']:9.3f} {'-':>9} {'new':>8}")
+            continue
+        change = result["p50_ms"] / baseline[name]["p50_ms"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:58} {result['p50_ms']:9.3f} {baseline[name]['p50_ms']:9.3f} {100 * change:+7.1f}%{flag}"
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the WebSearch agent's CPU hot paths on the saved corpus"
+    )
+    arg_parser.add_argument("-n", "--num-search-results", type=int, default=10)
+    arg_parser.add_argument("-i", "--iterations", type=int, default=50)
+    arg_parser.add_argument(
+        "-t",
+        "--min-seconds",
+        type=float,
+        default=0.5,
+        help="Minimum timed duration per case",
+    )
+    arg_parser.add_argument(
+        "-k", "--filter", default="", help="Only run cases whose name contains this"
+    )
+    arg_parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Baseline file to compare against (default: benchmarks/baseline.json)",
+    )
+    arg_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run's results to the baseline file instead of comparing",
+    )
+    arg_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.15,
+        help="Allowed relative slowdown of a case's median before it is a regression",
+    )
+    args = arg_parser.parse_args()
+    logging.disable(logging.CRITICAL)  # the agent logs every prompt assembly
+
+    with DEFAULT_CONFIG.open("r") as f:
+        agent_config = yaml.safe_load(f)
+
+    print("\n" + "=" * 60)
+    print("WEBSEARCH HOT PATH BENCHMARK")
+    print("=" * 60)
+    print(
+        f"\n{'case':58} {'ops/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9}"
+    )
+
+    results = {}
+    for name, func in build_cases(agent_config, args.num_search_results):
+        if args.filter not in name:
+            continue
+        result = run_case(func, args.iterations, args.min_seconds)
+        results[name] = result
+        print(
+            f"{name:58} {result['ops_per_s']:9.1f} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f}"
+            f" {result['p99_ms']:9.3f} {result['peak_kib']:9.1f}"
+        )
+
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nSaved baseline for {len(results)} cases to {args.baseline}")
+        print("=" * 60 + "\n")
+        sys.exit(0)
+
+    if not args.baseline.exists():
+        print(
+            f"\nNo baseline at {args.baseline}, run with --save-baseline to create one"
+        )
+        print("=" * 60 + "\n")
+        sys.exit(0)
+
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    print(
+        f"\n{len(regressions)} regressions over {100 * args.tolerance:.0f}% in {len(results)} cases"
+    )
+    print("=" * 60 + "\n")
+    sys.exit(1 if len(regressions) > 0 else 0)
@@ -0,0 +1,76 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root
+from agents.websearch.workers import (
+    _parse_search_html,
+    _parse_search_html_lxml,
+    _parse_search_json,
+)
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+
+def time_parser(parser, text, num_search_results, iterations):
+    """
+    Times one parse path on one saved SearXNG page
+
+    Args:
+        parser (func): The parse function
+        text (str): The saved page (HTML or JSON)
+        num_search_results (int): The number of results to parse
+        iterations (int): The number of timed runs
+
+    Returns:
+        times (list): The wall time of each run in seconds
+    """
+    parser(text, num_search_results)  # warm-up
+    times = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        parser(text, num_search_results)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the SearXNG result parse paths on saved pages"
+    )
+    arg_parser.add_argument("-n", "--num-search-results", type=int, default=10)
+    arg_parser.add_argument("-i", "--iterations", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    parse_paths = [
+        ("html / html.parser (BeautifulSoup)", _parse_search_html, ".html"),
+        ("html / lxml (incremental)", _parse_search_html_lxml, ".html"),
+        ("json API", _parse_search_json, ".json"),
+    ]
+
+    print("\n" + "=" * 60)
+    print("SEARXNG PARSE BENCHMARK")
+    print("=" * 60)
+
+    for page in sorted(CORPUS_DIR.glob("searxng_*.html")):
+        print(f"\n--- {page.stem} ---")
+        reference = None
+        for name, parser, suffix in parse_paths:
+            saved_page = page.with_suffix(suffix)
+            if not saved_page.exists():
+                print(f"  {name:38} (no {suffix} capture)")
+                continue
+            text = saved_page.read_text(encoding="utf-8")
+            times = time_parser(parser, text, args.num_search_results, args.iterations)
+            links = [r["link"] for r in parser(text, args.num_search_results)]
+            if reference is None:
+                reference = links
+            match = "same results" if links == reference else "RESULTS DIFFER"
+            print(
+                f"  {name:38} median {1000 * statistics.median(times):7.3f}ms"
+                f"  p95 {1000 * sorted(times)[int(0.95 * len(times))]:7.3f}ms  ({match})"
+            )
+
+    print("=" * 60 + "\n")
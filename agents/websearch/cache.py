@@ -0,0 +1,532 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track clicks and never change page content
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+# Words ignored by stop-word-insensitive query matching
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the this to was what when where which who why with".split()
+)
+
+_page_caches = {}
+_search_cache = None
+_tool_memo = None
+_registry_lock = threading.Lock()
+
+
+def normalize_url(url):
+    """
+    Normalizes a URL so trivially different links to the same page share a cache entry
+
+    Lowercases the scheme and host, drops default ports, fragments and tracking parameters, and sorts the query string.
+
+    Args:
+        url (str): The URL to normalize
+
+    Returns:
+        normalized_url (str): The normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (
+        (scheme == "http" and parts.port == 80)
+        or (scheme == "https" and parts.port == 443)
+    ):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def normalize_query(query, ignore_stop_words=False):
+    """
+    Normalizes a search query so near-identical generated queries share a cache entry
+
+    Args:
+        query (str): The search query
+        ignore_stop_words (bool, default=False): Also drop common stop words (e.g. "the", "of", "what")
+
+    Returns:
+        normalized_query (str): The case-folded, whitespace-collapsed query
+    """
+    words = re.sub(r"[\"'?!.,]", " ", query).casefold().split()
+    if ignore_stop_words:
+        words = [word for word in words if word not in STOP_WORDS] or words
+    return " ".join(words)
+
+
+class SearchCache:
+    """
+    Bounded in-memory cache of parsed SearXNG results with a short TTL, keyed by normalized query
+
+    Results are stored as tuples of (id, title, link, search_description) so a hit skips both the HTTP request and the
+    parse.
+    """
+
+    def __init__(self, ttl, max_entries, ignore_stop_words=False):
+        """
+        Constructor to set cache limits
+
+        Args:
+            ttl (int): Seconds a result list stays valid
+            max_entries (int): Maximum number of cached queries before the least recently used is dropped
+            ignore_stop_words (bool, default=False): Match queries that only differ by stop words
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.ignore_stop_words = ignore_stop_words
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        """
+        Looks up the results for a query
+
+        Args:
+            query (str): The search query
+
+        Returns:
+            results (list): None on a miss, otherwise the results in `searxng_search` format
+        """
+        key = normalize_query(query, self.ignore_stop_words)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                self._entries.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            compact = entry[1]
+        return [
+            {"id": rank, "title": title, "link": link, "search_description": snippet}
+            for rank, title, link, snippet in compact
+        ]
+
+    def put(self, query, results):
+        """
+        Mutator function to cache the results for a query
+
+        Args:
+            query (str): The search query
+            results (list): The results in `searxng_search` format
+        """
+        key = normalize_query(query, self.ignore_stop_words)
+        compact = tuple(
+            (
+                result["id"],
+                result["title"],
+                result["link"],
+                result["search_description"],
+            )
+            for result in results
+        )
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, compact)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class ToolMemo:
+    """
+    Memoized SLM tool results keyed on (tool, model, system message and options hash, normalized prompt)
+
+    Keeps a bounded in-memory LRU, optionally backed by a SQLite file so results survive restarts. Changing a tool's
+    model, system prompt or ollama options (e.g. `num_predict`, `temperature`) changes its key, and stale on-disk rows
+    for that tool are deleted the first time the new configuration is used.
+    """
+
+    def __init__(self, max_entries, disk_path=None):
+        """
+        Constructor to set the LRU size and open the optional on-disk store
+
+        Args:
+            max_entries (int): Maximum number of results kept in memory
+            disk_path (str, default=None): Path to the SQLite backing store, in-memory only when None
+        """
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._checked_fingerprints = set()
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, tool TEXT, fingerprint TEXT, value TEXT)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _fingerprint(model, system_content, options=None):
+        """Hashes the tool configuration a result depends on"""
+        return hashlib.sha256(
+            f"{model}\0{system_content}\0{json.dumps(options, sort_keys=True)}".encode(
+                "utf-8"
+            )
+        ).hexdigest()
+
+    def _key(self, tool, fingerprint, prompt):
+        """Hashes a tool call into its memo key"""
+        return hashlib.sha256(
+            f"{tool}\0{fingerprint}\0{normalize_query(prompt)}".encode("utf-8")
+        ).hexdigest()
+
+    def get(self, tool, model, system_content, prompt, options=None):
+        """
+        Looks up a memoized tool result
+
+        Args:
+            tool (str): The tool name (e.g. "decide_to_search")
+            model (str): The tool's model
+            system_content (str): The tool's system prompt
+            prompt (str): The user prompt passed to the tool
+            options (dict, default=None): The tool's ollama options
+
+        Returns:
+            value: The memoized result, or None on a miss
+        """
+        fingerprint = self._fingerprint(model, system_content, options)
+        key = self._key(tool, fingerprint, prompt)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                self._invalidate_stale(tool, fingerprint)
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.stats["hits"] += 1
+                    return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, tool, model, system_content, prompt, value, options=None):
+        """
+        Mutator function to memoize a tool result
+
+        Args:
+            tool (str): The tool name (e.g. "decide_to_search")
+            model (str): The tool's model
+            system_content (str): The tool's system prompt
+            prompt (str): The user prompt passed to the tool
+            value: The JSON-serializable tool result
+            options (dict, default=None): The tool's ollama options
+        """
+        fingerprint = self._fingerprint(model, system_content, options)
+        key = self._key(tool, fingerprint, prompt)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                    (key, tool, fingerprint, json.dumps(value)),
+                )
+                self._db.commit()
+
+    def _remember(self, key, value):
+        """Adds a result to the in-memory LRU (caller holds the lock)"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _invalidate_stale(self, tool, fingerprint):
+        """Deletes on-disk results of a tool made with another model or system prompt (caller holds the lock)"""
+        if (tool, fingerprint) in self._checked_fingerprints:
+            return
+        deleted = self._db.execute(
+            "DELETE FROM results WHERE tool = ? AND fingerprint != ?",
+            (tool, fingerprint),
+        ).rowcount
+        self._db.commit()
+        self._checked_fingerprints.add((tool, fingerprint))
+        if deleted:
+            logging.warning(
+                f"[+] ToolMemo: Invalidated {deleted} {tool} results from an old model or system prompt"
+            )
+
+
+class PageCache:
+    """
+    Persistent SQLite cache of extracted webpage text, keyed by normalized URL
+
+    Entries expire after a per-domain TTL. Expired entries that have an ETag or Last-Modified value are kept so the
+    page can be revalidated with a conditional request. The cache is bounded by the total size of the stored text and
+    evicts the least recently used entries first.
+    """
+
+    def __init__(self, path, max_bytes, default_ttl, domain_ttls=None):
+        """
+        Constructor to open (or create) the cache database
+
+        Args:
+            path (str): Path to the SQLite database file
+            max_bytes (int): Maximum total size of cached text before LRU eviction
+            default_ttl (int): Seconds an entry stays fresh when its domain has no TTL set
+            domain_ttls (dict, default=None): Per-domain TTLs of format {"{domain}": seconds}, also matching subdomains
+        """
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0}
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                raw_bytes INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """)
+        self._db.commit()
+
+    def ttl_for(self, url):
+        """
+        Accessor function for the TTL of a URL, using the most specific matching domain in `domain_ttls`
+
+        Args:
+            url (str): The page URL
+
+        Returns:
+            ttl (int): The TTL in seconds
+        """
+        host = (urlsplit(url).hostname or "").lower()
+        labels = host.split(".")
+        for i in range(len(labels)):
+            domain = ".".join(labels[i:])
+            if domain in self.domain_ttls:
+                return self.domain_ttls[domain]
+        return self.default_ttl
+
+    def lookup(self, url):
+        """
+        Looks up a page in the cache
+
+        Args:
+            url (str): The page URL
+
+        Returns:
+            entry (dict): None on a miss, otherwise {"content": str, "etag": str, "last_modified": str, "fresh": bool}
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content, etag, last_modified, raw_bytes, expires_at FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            content, etag, last_modified, raw_bytes, expires_at = row
+            fresh = expires_at > now
+            if fresh:
+                self.stats["hits"] += 1
+                self.stats["bytes_saved"] += raw_bytes
+            elif etag is None and last_modified is None:
+                # Nothing to revalidate with, treat as a miss
+                self.stats["misses"] += 1
+                return None
+            self._db.execute(
+                "UPDATE pages SET last_access = ? WHERE url = ?", (now, key)
+            )
+            self._db.commit()
+        return {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": fresh,
+        }
+
+    def store(self, url, content, etag=None, last_modified=None, raw_bytes=0):
+        """
+        Mutator function to add or replace a page, then evict least recently used pages over `max_bytes`
+
+        Args:
+            url (str): The page URL
+            content (str): The extracted page text
+            etag (str, default=None): The response's ETag header
+            last_modified (str, default=None): The response's Last-Modified header
+            raw_bytes (int, default=0): Size of the downloaded HTML, counted as saved on later hits
+        """
+        key = normalize_url(url)
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    content,
+                    etag,
+                    last_modified,
+                    raw_bytes,
+                    size,
+                    now + self.ttl_for(url),
+                    now,
+                ),
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url, raw_bytes=0):
+        """
+        Mutator function to mark a revalidated (HTTP 304) page as fresh for another TTL
+
+        Args:
+            url (str): The page URL
+            raw_bytes (int, default=0): Size of the downloaded HTML the 304 response saved
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT raw_bytes FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            self.stats["revalidated"] += 1
+            self.stats["bytes_saved"] += row[0] if row else raw_bytes
+            self._db.execute(
+                "UPDATE pages SET expires_at = ?, last_access = ? WHERE url = ?",
+                (now + self.ttl_for(url), now, key),
+            )
+            self._db.commit()
+
+    def _evict(self):
+        """Deletes least recently used pages until the cache is within `max_bytes` (caller holds the lock)"""
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM pages"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute(
+            "SELECT url, size FROM pages ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM pages WHERE url = ?", (key,))
+            total -= size
+            evicted += 1
+        logging.debug(f"[*] PageCache: Evicted {evicted} least recently used pages")
+
+    def report(self):
+        """
+        Accessor function for cache statistics
+
+        Returns:
+            report (dict): The hit/revalidated/miss counters, bytes saved and overall hit rate
+        """
+        with self._lock:
+            report = dict(self.stats)
+        lookups = report["hits"] + report["revalidated"] + report["misses"]
+        hits = report["hits"] + report["revalidated"]
+        report["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        return report
+
+
+def get_page_cache(agent_config):
+    """
+    Returns the shared page cache for the agent config, or None when the cache is disabled
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        page_cache (PageCache): The page cache, opened on first use
+    """
+    cache_config = agent_config["workers"]["scrape_webpage"].get("page_cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+
+    # Relative paths are relative to the agent directory, like agent_config.yaml
+    path = Path(__file__).resolve().parent / cache_config["path"]
+    with _registry_lock:
+        if path not in _page_caches:
+            _page_caches[path] = PageCache(
+                str(path),
+                cache_config["max_bytes"],
+                cache_config["default_ttl"],
+                cache_config.get("domain_ttls"),
+            )
+        return _page_caches[path]
+
+
+def get_search_cache(agent_config):
+    """
+    Returns the shared SearXNG results cache, or None when the cache is disabled
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        search_cache (SearchCache): The results cache, created on first use
+    """
+    global _search_cache
+
+    cache_config = agent_config["workers"]["searxng_search"].get("results_cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+
+    with _registry_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                cache_config["ttl"],
+                cache_config["max_entries"],
+                cache_config.get("ignore_stop_words", False),
+            )
+        return _search_cache
+
+
+def get_tool_memo(agent_config):
+    """
+    Returns the shared tool result memo, or None when memoization is disabled
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including tool settings
+
+    Returns:
+        tool_memo (ToolMemo): The tool result memo, created on first use
+    """
+    global _tool_memo
+
+    memo_config = agent_config.get("memoization", {})
+    if not memo_config.get("enabled", False):
+        return None
+
+    with _registry_lock:
+        if _tool_memo is None:
+            disk_path = memo_config.get("disk_path")
+            if disk_path:
+                disk_path = str(Path(__file__).resolve().parent / disk_path)
+            _tool_memo = ToolMemo(memo_config["max_entries"], disk_path)
+        return _tool_memo
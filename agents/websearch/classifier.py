@@ -0,0 +1,250 @@
+import json
+import logging
+import math
+import random
+import re
+import threading
+import zlib
+from pathlib import Path
+
+DEFAULT_NUM_FEATURES = 2**14
+
+_classifiers = {}
+_registry_lock = threading.Lock()
+_log_lock = threading.Lock()
+
+
+class SearchClassifier:
+    """
+    Hashed bag-of-words logistic regression that scores how likely a prompt needs a web search
+
+    Features are the prompt's lowercased words and word pairs, hashed into `num_features` buckets (with a hashed sign
+    to spread collisions) and L2 normalized. Scoring a prompt is a handful of dictionary lookups, microseconds
+    next to an SLM call.
+    """
+
+    def __init__(self, num_features=DEFAULT_NUM_FEATURES, weights=None, bias=0.0):
+        """
+        Constructor to set the model size and parameters
+
+        Args:
+            num_features (int, default=16384): The number of hashed feature buckets
+            weights (dict, default=None): Non-zero weights of format {bucket: weight}
+            bias (float, default=0.0): The intercept
+        """
+        self.num_features = num_features
+        self.weights = weights or {}
+        self.bias = bias
+        self.stats = {"answered": 0, "deferred": 0}
+        self._lock = threading.Lock()
+
+    def features(self, prompt):
+        """
+        Hashes a prompt into its sparse feature vector
+
+        Args:
+            prompt (str): The user prompt
+
+        Returns:
+            features (dict): L2 normalized feature values of format {bucket: value}
+        """
+        words = re.findall(r"\w+", prompt.lower())
+        terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        features = {}
+        for term in terms:
+            digest = zlib.crc32(term.encode("utf-8"))
+            bucket = digest % self.num_features
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            features[bucket] = features.get(bucket, 0.0) + sign
+        norm = math.sqrt(sum(value * value for value in features.values())) or 1.0
+        return {bucket: value / norm for bucket, value in features.items()}
+
+    def predict_proba(self, prompt):
+        """
+        Scores a prompt
+
+        Args:
+            prompt (str): The user prompt
+
+        Returns:
+            probability (float): The estimated probability that the prompt needs a web search
+        """
+        z = self.bias + sum(
+            self.weights.get(bucket, 0.0) * value
+            for bucket, value in self.features(prompt).items()
+        )
+        return _sigmoid(z)
+
+    def decide(self, prompt, true_threshold, false_threshold):
+        """
+        Answers a prompt locally when the model is confident
+
+        Args:
+            prompt (str): The user prompt
+            true_threshold (float): Scores at or above this are answered True
+            false_threshold (float): Scores at or below this are answered False
+
+        Returns:
+            web_search_needed (bool): The local answer, or None if the prompt should go to the SLM
+        """
+        probability = self.predict_proba(prompt)
+        decision = None
+        if probability >= true_threshold:
+            decision = True
+        elif probability <= false_threshold:
+            decision = False
+        with self._lock:
+            self.stats["deferred" if decision is None else "answered"] += 1
+        return decision
+
+    def train(self, examples, epochs=100, learning_rate=0.5, l2=1e-4, seed=0):
+        """
+        Mutator function to fit the model with stochastic gradient descent on the log loss
+
+        Classes are weighted inversely to their frequency so an unbalanced set of logged decisions does not push
+        every score towards the majority answer.
+
+        Args:
+            examples (list): Labelled prompts of format (prompt, web_search_needed)
+            epochs (int, default=100): Passes over the examples
+            learning_rate (float, default=0.5): The initial step size, decayed each epoch
+            l2 (float, default=1e-4): The L2 regularization strength
+            seed (int, default=0): The shuffle seed
+        """
+        featurized = [
+            (self.features(prompt), float(label)) for prompt, label in examples
+        ]
+        positives = sum(label for _, label in featurized)
+        class_weight = {
+            1.0: len(featurized) / (2 * max(positives, 1)),
+            0.0: len(featurized) / (2 * max(len(featurized) - positives, 1)),
+        }
+        weights = dict(self.weights)
+        bias = self.bias
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(featurized)
+            step = learning_rate / (1 + 0.05 * epoch)
+            for features, label in featurized:
+                z = bias + sum(weights.get(b, 0.0) * v for b, v in features.items())
+                gradient = (_sigmoid(z) - label) * class_weight[label]
+                for bucket, value in features.items():
+                    weight = weights.get(bucket, 0.0)
+                    weights[bucket] = weight - step * (gradient * value + l2 * weight)
+                bias -= step * gradient
+        self.weights = {b: w for b, w in weights.items() if abs(w) > 1e-6}
+        self.bias = bias
+
+    def save(self, path):
+        """
+        Saves the model parameters as JSON
+
+        Args:
+            path (str): The model file path
+        """
+        with Path(path).open("w") as f:
+            json.dump(
+                {
+                    "num_features": self.num_features,
+                    "bias": self.bias,
+                    "weights": {str(b): w for b, w in self.weights.items()},
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a model saved with `save`
+
+        Args:
+            path (str): The model file path
+
+        Returns:
+            classifier (SearchClassifier): The loaded model
+        """
+        with Path(path).open("r") as f:
+            model = json.load(f)
+        return cls(
+            model["num_features"],
+            {int(b): w for b, w in model["weights"].items()},
+            model["bias"],
+        )
+
+
+def _sigmoid(z):
+    """Numerically stable logistic function"""
+    if z >= 0:
+        return 1 / (1 + math.exp(-z))
+    exp_z = math.exp(z)
+    return exp_z / (1 + exp_z)
+
+
+def get_classifier(agent_config):
+    """
+    Returns the decide_to_search pre-classifier, or None when it is disabled or has not been trained
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including tool settings
+
+    Returns:
+        classifier (SearchClassifier): The pre-classifier, loaded on first use
+    """
+    gate_config = agent_config["tools"]["decide_to_search"].get("pre_classifier", {})
+    if not gate_config.get("enabled", False):
+        return None
+
+    # Relative paths are relative to the agent directory, like agent_config.yaml
+    path = Path(__file__).resolve().parent / gate_config["model_path"]
+    with _registry_lock:
+        if path not in _classifiers:
+            if not path.exists():
+                logging.warning(
+                    f"[-] WebSearchAgent.decide_to_search: No pre-classifier model at {path}, run tuning/train_classifier.py"
+                )
+                _classifiers[path] = None
+            else:
+                _classifiers[path] = SearchClassifier.load(path)
+        return _classifiers[path]
+
+
+def pre_classify(user_prompt, agent_config):
+    """
+    Answers a decide_to_search prompt with the pre-classifier when it is confident
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool settings
+
+    Returns:
+        web_search_needed (bool): The local answer, or None if the SLM should decide
+    """
+    classifier = get_classifier(agent_config)
+    if classifier is None:
+        return None
+    gate_config = agent_config["tools"]["decide_to_search"]["pre_classifier"]
+    decision = classifier.decide(
+        user_prompt, gate_config["true_threshold"], gate_config["false_threshold"]
+    )
+    logging.warning(
+        f"[+] WebSearchAgent.decide_to_search: Pre-classifier {'answered ' + str(decision) if decision is not None else 'deferred to SLM'} (SLM calls avoided: {classifier.stats['answered']}, deferred: {classifier.stats['deferred']})"
+    )
+    return decision
+
+
+def log_decision(user_prompt, web_search_needed, agent_config):
+    """
+    Appends an SLM decision to the decision log, as training data for the pre-classifier
+
+    Args:
+        user_prompt (str): The user prompt that was assessed
+        web_search_needed (bool): The SLM's decision
+        agent_config (dict): The agent class instance's configuration values, including tool settings
+    """
+    gate_config = agent_config["tools"]["decide_to_search"].get("pre_classifier", {})
+    if not gate_config.get("log_path"):
+        return
+    path = Path(__file__).resolve().parent / gate_config["log_path"]
+    line = json.dumps({"prompt": user_prompt, "decision": web_search_needed})
+    with _log_lock, path.open("a") as f:
+        f.write(line + "\n")
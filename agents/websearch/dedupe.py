@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import re
+
+FINGERPRINT_BITS = 64
+
+
+def simhash(text, shingle_size=4):
+    """
+    Computes the SimHash fingerprint of a page's text
+
+    Every distinct run of `shingle_size` words is hashed to 64 bits, and each fingerprint bit is set when most shingle
+    hashes have it set. Pages sharing most of their shingles get fingerprints that differ in only a few bits.
+
+    Args:
+        text (str): The extracted page text
+        shingle_size (int, default=4): Words per shingle
+
+    Returns:
+        fingerprint (int): The 64-bit fingerprint
+    """
+    words = re.findall(r"\w+", text.lower())
+    shingles = {
+        " ".join(words[i : i + shingle_size])
+        for i in range(max(1, len(words) - shingle_size + 1))
+    }
+    hashes = [
+        f"{int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'):064b}"
+        for shingle in shingles
+    ]
+    # Count the set bits of every position across all shingle hashes at once (column-wise over the bit strings)
+    fingerprint = 0
+    for column in zip(*hashes):
+        fingerprint = (fingerprint << 1) | (2 * column.count("1") > len(hashes))
+    return fingerprint
+
+
+def similarity(fingerprint_a, fingerprint_b):
+    """
+    Estimates how similar two pages are from their fingerprints
+
+    Args:
+        fingerprint_a (int): A `simhash` fingerprint
+        fingerprint_b (int): A `simhash` fingerprint
+
+    Returns:
+        similarity (float): The fraction of equal fingerprint bits (1.0 for identical shingle sets)
+    """
+    return 1 - bin(fingerprint_a ^ fingerprint_b).count("1") / FINGERPRINT_BITS
+
+
+class PageDeduper:
+    """
+    Tracks the pages kept for one search and rejects pages that are near-copies of them (syndicated articles,
+    mirrored docs)
+    """
+
+    def __init__(self, threshold, shingle_size=4):
+        """
+        Constructor to set the similarity threshold
+
+        Args:
+            threshold (float): Pages at least this similar to a kept page are duplicates (0.9 allows 6 of 64 bits to differ)
+            shingle_size (int, default=4): Words per shingle
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.kept = []  # (url, fingerprint)
+        self.skipped = []  # (url, url of the kept page it duplicates)
+
+    def is_duplicate(self, url, text):
+        """
+        Mutator function to check a scraped page, keeping its fingerprint if it is not a duplicate
+
+        Args:
+            url (str): The page URL
+            text (str): The extracted page text
+
+        Returns:
+            duplicate (bool): True if the page is a near-copy of a kept page and should be skipped
+        """
+        fingerprint = simhash(text, self.shingle_size)
+        for kept_url, kept_fingerprint in self.kept:
+            if similarity(fingerprint, kept_fingerprint) >= self.threshold:
+                logging.info(
+                    f"[*] WebSearchAgent.searxng_search: Skipping {url}, near-duplicate of {kept_url}"
+                )
+                self.skipped.append((url, kept_url))
+                return True
+        self.kept.append((url, fingerprint))
+        return False
+
+
+def get_deduper(agent_config):
+    """
+    Returns a deduper for one search, or None when near-duplicate detection is disabled
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        deduper (PageDeduper): A new deduper with no kept pages
+    """
+    dedupe_config = agent_config["workers"]["searxng_search"].get("dedupe", {})
+    if not dedupe_config.get("enabled", False):
+        return None
+    return PageDeduper(
+        dedupe_config.get("threshold", 0.9), dedupe_config.get("shingle_size", 4)
+    )
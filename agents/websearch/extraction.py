@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from copy import deepcopy
+
+from trafilatura import extract
+from trafilatura.settings import DEFAULT_CONFIG as TRF_CONFIG
+
+# Seconds the caller waits past the deadline for a worker to report its own timeout
+DEADLINE_GRACE = 1.0
+
+# Returned by a worker that interrupted itself at the deadline, told apart from trafilatura's None (no text found)
+TIMED_OUT = "__extraction_timed_out__"
+
+_extraction_pool = None
+_registry_lock = threading.Lock()
+
+# Set once in each worker process by `_init_worker`
+_worker_config = None
+_worker_deadline = None
+
+
+class ExtractionTimeout(Exception):
+    """Raised in a worker when a page runs past the extraction deadline"""
+
+
+def _init_worker(download_timeout, extraction_timeout):
+    """
+    Worker process initializer, builds the trafilatura config once instead of on every page
+
+    Args:
+        download_timeout (str): The trafilatura DOWNLOAD_TIMEOUT setting
+        extraction_timeout (str): The per-page extraction deadline in seconds
+    """
+    global _worker_config, _worker_deadline
+    _worker_config = deepcopy(TRF_CONFIG)
+    _worker_config["DEFAULT"]["DOWNLOAD_TIMEOUT"] = download_timeout
+    _worker_config["DEFAULT"]["EXTRACTION_TIMEOUT"] = extraction_timeout
+    _worker_deadline = float(extraction_timeout)
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _raise_timeout)
+
+
+def _raise_timeout(signum, frame):
+    """SIGALRM handler interrupting the running extraction"""
+    raise ExtractionTimeout()
+
+
+def _warm_up():
+    """Empty task that makes the pool start a worker ahead of the first page"""
+    return True
+
+
+def _extract_in_worker(html):
+    """
+    Extracts the plaintext contents of downloaded HTML inside a worker process
+
+    Where the platform has SIGALRM, the worker interrupts itself at the deadline so it is free for the next page.
+
+    Args:
+        html (bytes): The raw page HTML, decoded by trafilatura
+
+    Returns:
+        contents (str): The plain text contents of the page (None if it has none, `TIMED_OUT` past the deadline)
+    """
+    timer = hasattr(signal, "setitimer") and _worker_deadline > 0
+    if timer:
+        signal.setitimer(signal.ITIMER_REAL, _worker_deadline)
+    try:
+        return extract(
+            html,
+            include_formatting=True,
+            include_links=True,
+            config=_worker_config,
+        )
+    except ExtractionTimeout:
+        return TIMED_OUT
+    finally:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class ExtractionPool:
+    """
+    Runs trafilatura extraction in a pool of worker processes, so extracting large pages does not hold the GIL that
+    the event loop and the other sessions' token streams need
+    """
+
+    def __init__(self, processes, download_timeout, extraction_timeout):
+        """
+        Constructor to start the worker processes
+
+        Args:
+            processes (int): The number of worker processes
+            download_timeout (str): The trafilatura DOWNLOAD_TIMEOUT setting
+            extraction_timeout (str): The per-page extraction deadline in seconds (0 for none)
+        """
+        self.processes = processes
+        self.initargs = (str(download_timeout), str(extraction_timeout))
+        self.deadline = float(extraction_timeout)
+        self.stats = {"extracted": 0, "empty": 0, "timeouts": 0, "failures": 0}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._start()
+
+    def _start(self):
+        """Mutator function to (re)create the executor and start every worker"""
+        # "spawn" workers do not inherit the parent's threads and locks (pools, caches, the event loop)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=self.initargs,
+        )
+        for _ in range(self.processes):
+            self._executor.submit(_warm_up)
+
+    def submit(self, html):
+        """
+        Queues a page for extraction
+
+        Args:
+            html (bytes): The raw page HTML
+
+        Returns:
+            future (Future): The future of the extracted text
+        """
+        with self._lock:
+            try:
+                return self._executor.submit(_extract_in_worker, html)
+            except BrokenProcessPool:
+                logging.warning(
+                    "[-] WebSearchAgent.scrape_webpage: Extraction pool broke (a worker died), restarting it"
+                )
+                self._start()
+                return self._executor.submit(_extract_in_worker, html)
+
+    def extract(self, html):
+        """
+        Extracts a page in the pool, waiting up to the deadline
+
+        Args:
+            html (bytes): The raw page HTML
+
+        Returns:
+            contents (str): The plain text contents of the page (None on failure or past the deadline)
+        """
+        future = self.submit(html)
+        try:
+            return self._result(future.result(timeout=self._timeout()))
+        except FutureTimeoutError:
+            return self._timed_out(future)
+        except Exception:
+            return self._failed()
+
+    async def async_extract(self, html):
+        """
+        Async counterpart of `extract`, awaiting the worker without blocking the event loop
+
+        Args:
+            html (bytes): The raw page HTML
+
+        Returns:
+            contents (str): The plain text contents of the page (None on failure or past the deadline)
+        """
+        future = self.submit(html)
+        try:
+            return self._result(
+                await asyncio.wait_for(asyncio.wrap_future(future), self._timeout())
+            )
+        except asyncio.TimeoutError:
+            return self._timed_out(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception:
+            return self._failed()
+
+    def _timeout(self):
+        """Seconds to wait on a page, None for no deadline"""
+        return self.deadline + DEADLINE_GRACE if self.deadline > 0 else None
+
+    def _result(self, contents):
+        """Counts a finished extraction, returning None when the page had no text or the worker hit the deadline"""
+        if contents == TIMED_OUT:
+            return self._timed_out()
+        with self._lock:
+            self.stats["extracted" if contents is not None else "empty"] += 1
+        return contents
+
+    def _timed_out(self, future=None):
+        """Counts a page the worker did not finish in time (`future` is cancelled if the caller stopped waiting)"""
+        if future is not None:
+            future.cancel()
+        with self._lock:
+            self.stats["timeouts"] += 1
+        logging.debug(
+            f"[-] WebSearchAgent.scrape_webpage: Extraction passed the {self.deadline}s deadline"
+        )
+        return None
+
+    def _failed(self):
+        """Counts a page whose extraction raised"""
+        with self._lock:
+            self.stats["failures"] += 1
+        return None
+
+    def shutdown(self):
+        """Mutator function to stop the worker processes"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_extraction_pool(agent_config):
+    """
+    Returns the shared extraction pool, or None when extraction runs in-process
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        extraction_pool (ExtractionPool): The extraction pool, started on first use (first config loaded wins)
+    """
+    global _extraction_pool
+
+    scrape_config = agent_config["workers"]["scrape_webpage"]
+    pool_config = scrape_config.get("extraction_pool", {})
+    if not pool_config.get("enabled", False):
+        return None
+
+    with _registry_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ExtractionPool(
+                max(1, pool_config.get("processes", 2)),
+                scrape_config["trafilatura_download_timeout"],
+                scrape_config["trafilatura_extraction_timeout"],
+            )
+        return _extraction_pool
@@ -0,0 +1,250 @@
+import json
+import logging
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlsplit
+
+_domain_healths = {}
+_registry_lock = threading.Lock()
+
+
+def domain_of(url):
+    """
+    Returns the domain a URL's health is tracked under
+
+    Args:
+        url (str): The page URL
+
+    Returns:
+        domain (str): The lowercased host, without a leading "www."
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainHealth:
+    """
+    Persistent per-domain scrape statistics, used to order scrape candidates and circuit-break failing domains
+
+    Every page fetch records whether it produced enough text, how long it took and how much text it produced. Only the
+    last `window` fetches of a domain are kept. Domains with a low success rate or a slow median fetch are tried after
+    the healthy ones, and a domain that fails `failure_threshold` times in a row is skipped for `cooldown` seconds. After
+    the cooldown it is tried once again: a success closes the circuit, another failure opens it again.
+    """
+
+    def __init__(
+        self,
+        path,
+        window=20,
+        min_samples=3,
+        min_success_rate=0.5,
+        max_median_latency=5.0,
+        min_text_chars=200,
+        failure_threshold=3,
+        cooldown=3600,
+    ):
+        """
+        Constructor to open (or create) the statistics database and load every domain
+
+        Args:
+            path (str): Path to the SQLite database file
+            window (int, default=20): Most recent fetches kept per domain
+            min_samples (int, default=3): Fetches needed before a domain can be deprioritized
+            min_success_rate (float, default=0.5): Domains below this success rate are tried last
+            max_median_latency (float, default=5.0): Domains with a slower median fetch (seconds) are tried last
+            min_text_chars (int, default=200): Extracted text shorter than this (paywalls, cookie walls) is a failure
+            failure_threshold (int, default=3): Consecutive failures that open a domain's circuit (0 never opens it)
+            cooldown (int, default=3600): Seconds a domain is skipped once its circuit opens
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.max_median_latency = max_median_latency
+        self.min_text_chars = min_text_chars
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._domains = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                samples TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                broken_until REAL NOT NULL
+            )
+            """)
+        self._db.commit()
+        for domain, samples, failures, broken_until in self._db.execute(
+            "SELECT domain, samples, failures, broken_until FROM domains"
+        ):
+            self._domains[domain] = {
+                "samples": deque(
+                    (tuple(sample) for sample in json.loads(samples)),
+                    maxlen=window,
+                ),
+                "failures": failures,
+                "broken_until": broken_until,
+            }
+
+    def record(self, url, latency, contents):
+        """
+        Mutator function to record the outcome of a page fetch
+
+        Args:
+            url (str): The page URL
+            latency (float): Seconds the fetch and extraction took
+            contents (str): The extracted page text (None if the fetch or extraction failed)
+        """
+        domain = domain_of(url)
+        text_len = len(contents) if contents is not None else 0
+        ok = text_len >= self.min_text_chars
+        with self._lock:
+            stats = self._domains.setdefault(
+                domain,
+                {
+                    "samples": deque(maxlen=self.window),
+                    "failures": 0,
+                    "broken_until": 0,
+                },
+            )
+            stats["samples"].append((ok, round(latency, 3), text_len))
+            if ok:
+                stats["failures"] = 0
+                stats["broken_until"] = 0
+            else:
+                stats["failures"] += 1
+                if 0 < self.failure_threshold <= stats["failures"]:
+                    stats["broken_until"] = time.time() + self.cooldown
+                    logging.warning(
+                        f"[-] WebSearchAgent.searxng_search: {domain} failed {stats['failures']} times in a row, skipping it for {self.cooldown}s"
+                    )
+            self._db.execute(
+                "INSERT OR REPLACE INTO domains VALUES (?, ?, ?, ?)",
+                (
+                    domain,
+                    json.dumps(list(stats["samples"])),
+                    stats["failures"],
+                    stats["broken_until"],
+                ),
+            )
+            self._db.commit()
+
+    def order(self, results):
+        """
+        Reorders search results by domain health, keeping the search rank order within each group
+
+        Results from domains with an open circuit are dropped, and results from unhealthy domains are moved after the
+        healthy (and unknown) ones.
+
+        Args:
+            results (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+
+        Returns:
+            results (list): The results to scrape, healthy domains first
+        """
+        now = time.time()
+        healthy, unhealthy, skipped = [], [], []
+        with self._lock:
+            for result in results:
+                stats = self._domains.get(domain_of(result["link"]))
+                if stats is None:
+                    healthy.append(result)
+                elif stats["broken_until"] > now:
+                    skipped.append(result["link"])
+                elif self._unhealthy(stats):
+                    unhealthy.append(result)
+                else:
+                    healthy.append(result)
+        if len(skipped) > 0 or len(unhealthy) > 0:
+            logging.info(
+                f"[*] WebSearchAgent.searxng_search: Domain health skipped {len(skipped)} and deprioritized {len(unhealthy)} results"
+            )
+        return healthy + unhealthy
+
+    def _unhealthy(self, stats):
+        """Checks a domain's samples against the health thresholds (caller holds the lock)"""
+        samples = stats["samples"]
+        if len(samples) < self.min_samples:
+            return False
+        success_rate = sum(ok for ok, _, _ in samples) / len(samples)
+        median_latency = statistics.median(latency for _, latency, _ in samples)
+        return (
+            success_rate < self.min_success_rate
+            or median_latency > self.max_median_latency
+        )
+
+    def report(self):
+        """
+        Accessor function for the statistics of every tracked domain
+
+        Returns:
+            report (list): Dictionaries of format {"domain", "fetches", "success_rate", "median_latency", "median_text_len", "failures", "status"}, most fetched first
+        """
+        now = time.time()
+        report = []
+        with self._lock:
+            for domain, stats in self._domains.items():
+                samples = stats["samples"]
+                if len(samples) == 0:
+                    continue
+                if stats["broken_until"] > now:
+                    status = f"skipped ({int(stats['broken_until'] - now)}s left)"
+                elif self._unhealthy(stats):
+                    status = "deprioritized"
+                else:
+                    status = "ok"
+                report.append(
+                    {
+                        "domain": domain,
+                        "fetches": len(samples),
+                        "success_rate": round(
+                            sum(ok for ok, _, _ in samples) / len(samples), 2
+                        ),
+                        "median_latency": round(
+                            statistics.median(latency for _, latency, _ in samples), 2
+                        ),
+                        "median_text_len": int(
+                            statistics.median(text_len for _, _, text_len in samples)
+                        ),
+                        "failures": stats["failures"],
+                        "status": status,
+                    }
+                )
+        return sorted(report, key=lambda row: (-row["fetches"], row["domain"]))
+
+
+def get_domain_health(agent_config):
+    """
+    Returns the shared domain health store for the agent config, or None when it is disabled
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        domain_health (DomainHealth): The domain health store, opened on first use
+    """
+    health_config = agent_config["workers"]["searxng_search"].get("domain_health", {})
+    if not health_config.get("enabled", False):
+        return None
+
+    # Relative paths are relative to the agent directory, like agent_config.yaml
+    path = Path(__file__).resolve().parent / health_config["path"]
+    with _registry_lock:
+        if path not in _domain_healths:
+            _domain_healths[path] = DomainHealth(
+                str(path),
+                health_config.get("window", 20),
+                health_config.get("min_samples", 3),
+                health_config.get("min_success_rate", 0.5),
+                health_config.get("max_median_latency", 5.0),
+                health_config.get("min_text_chars", 200),
+                health_config.get("failure_threshold", 3),
+                health_config.get("cooldown", 3600),
+            )
+        return _domain_healths[path]
@@ -1,6 +1,42 @@
+import json
 import logging
+import re
+import time
 
-import ollama
+from agents.websearch.cache import get_tool_memo
+from agents.websearch.classifier import get_classifier, log_decision, pre_classify
+from core.clients import get_async_ollama_client, get_ollama_client
+from core.tracing import record_ollama, span
+
+# Appended to the decide_to_search system prompt when several prompts are packed into one call
+BATCH_INSTRUCTIONS = """
+
+# Batch format
+- You will be given several numbered user prompts at once.
+- Answer each one on its own, as if it was the only prompt.
+- Output one line per prompt: its number, a colon, then "True" or "False" (e.g. "3: True").
+- Output nothing else."""
+# Output tokens budgeted per answer line of a batched call (e.g. "12: False" and a newline)
+BATCH_TOKENS_PER_ANSWER = 8
+# A numbered answer line, e.g. "3: True", "[3] false", "**3.** True"
+BATCH_ANSWER = re.compile(r"^\W*(\d+)\W+(true|false)\b", re.IGNORECASE)
+# JSON schema the decide_and_query output is constrained to (ollama structured outputs)
+DECIDE_AND_QUERY_FORMAT = {
+    "type": "object",
+    "properties": {
+        "search_needed": {"type": "boolean"},
+        "query": {"type": "string"},
+    },
+    "required": ["search_needed", "query"],
+}
+# JSON schema the generate_queries output is constrained to (ollama structured outputs)
+GENERATE_QUERIES_FORMAT = {
+    "type": "object",
+    "properties": {
+        "queries": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["queries"],
+}
 
 
 def decide_to_search(user_prompt, agent_config):
@@ -14,20 +50,150 @@ def decide_to_search(user_prompt, agent_config):
     Returns:
         web_search_needed (bool): A boolean determiantion if a web search is necessary for additional context
     """
+    return _run_tool(_decide_to_search_steps(user_prompt, agent_config), agent_config)
+
+
+async def async_decide_to_search(user_prompt, agent_config):
+    """
+    Async counterpart of `decide_to_search`, awaiting the ollama call on the running event loop
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (bool): A boolean determiantion if a web search is necessary for additional context
+    """
+    return await _async_run_tool(
+        _decide_to_search_steps(user_prompt, agent_config), agent_config
+    )
+
+
+def generate_query(user_prompt, agent_config):
+    """
+    Generates a web search query based on a user prompt
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        search_query (str): The generated search query
+    """
+    return _run_tool(_generate_query_steps(user_prompt, agent_config), agent_config)
+
+
+async def async_generate_query(user_prompt, agent_config):
+    """
+    Async counterpart of `generate_query`, awaiting the ollama call on the running event loop
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        search_query (str): The generated search query
+    """
+    return await _async_run_tool(
+        _generate_query_steps(user_prompt, agent_config), agent_config
+    )
+
+
+def decide_and_query(user_prompt, agent_config):
+    """
+    Determines if a prompt needs a web search and generates the search query in one call
+
+    The model answers with a JSON object constrained to `DECIDE_AND_QUERY_FORMAT`. If the output cannot be parsed,
+    the prompt goes through `decide_to_search` and `generate_query` instead.
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (bool): A boolean determination if a web search is necessary for additional context
+        search_query (str): The generated search query (empty string if no search is needed)
+    """
+    return _run_tool(_decide_and_query_steps(user_prompt, agent_config), agent_config)
+
+
+async def async_decide_and_query(user_prompt, agent_config):
+    """
+    Async counterpart of `decide_and_query`, awaiting the ollama call on the running event loop
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (bool): A boolean determination if a web search is necessary for additional context
+        search_query (str): The generated search query (empty string if no search is needed)
+    """
+    return await _async_run_tool(
+        _decide_and_query_steps(user_prompt, agent_config), agent_config
+    )
+
+
+def generate_queries(user_prompt, agent_config):
+    """
+    Generates several alternative web search queries for a user prompt in one call, for fan-out searches
+
+    The model answers with a JSON object constrained to `GENERATE_QUERIES_FORMAT`. If the output cannot be parsed,
+    the single `generate_query` query is used instead.
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        search_queries (list): Up to `num_queries` distinct search queries, best first
+    """
+    return _run_tool(_generate_queries_steps(user_prompt, agent_config), agent_config)
+
+
+async def async_generate_queries(user_prompt, agent_config):
+    """
+    Async counterpart of `generate_queries`, awaiting the ollama call on the running event loop
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        search_queries (list): Up to `num_queries` distinct search queries, best first
+    """
+    return await _async_run_tool(
+        _generate_queries_steps(user_prompt, agent_config), agent_config
+    )
 
-    host = agent_config["tools"]["decide_to_search"]["host"]
-    model = agent_config["tools"]["decide_to_search"]["model"]
-    system_message = agent_config["tools"]["decide_to_search"]["system_message"]
 
+def _decide_to_search_steps(user_prompt, agent_config):
+    """
+    Steps of `decide_to_search`, yielding its ollama request (see `_run_tool`)
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (bool): A boolean determiantion if a web search is necessary for additional context
+    """
     logging.info(
         "[+] WebSearchAgent.decide_to_search: Assessing query to determine if web search is necessary"
     )
-    client = ollama.Client(host)
-    response = client.chat(
-        model=model, messages=[system_message, {"role": "user", "content": user_prompt}]
-    )
-    content = response["message"]["content"]
-    web_search_needed = "true" in content.lower()
+    web_search_needed = _memo_get("decide_to_search", user_prompt, agent_config)
+    if web_search_needed is not None:
+        return web_search_needed
+
+    # Confidently obvious prompts are answered locally, without an SLM call
+    web_search_needed = pre_classify(user_prompt, agent_config)
+    if web_search_needed is not None:
+        return web_search_needed
+
+    content = yield _chat_request("decide_to_search", user_prompt, agent_config)
+    web_search_needed = _parse_decision(content)
+    log_decision(user_prompt, web_search_needed, agent_config)
+    _memo_put("decide_to_search", user_prompt, web_search_needed, agent_config)
 
     logging.info(
         f"[+] WebSearchAgent.decide_to_search: Exiting tool with return value: {web_search_needed}"
@@ -35,9 +201,9 @@ def decide_to_search(user_prompt, agent_config):
     return web_search_needed
 
 
-def generate_query(user_prompt, agent_config):
+def _generate_query_steps(user_prompt, agent_config):
     """
-    Generates a web search query based on a user prompt
+    Steps of `generate_query`, yielding its ollama request (see `_run_tool`)
 
     Args:
         user_prompt (str): The user prompt being assessed
@@ -46,19 +212,529 @@ def generate_query(user_prompt, agent_config):
     Returns:
         search_query (str): The generated search query
     """
+    search_query = _memo_get("generate_query", user_prompt, agent_config)
+    if search_query is not None:
+        return search_query
 
-    host = agent_config["tools"]["generate_query"]["host"]
-    model = agent_config["tools"]["generate_query"]["model"]
-    system_message = agent_config["tools"]["generate_query"]["system_message"]
     prompt = f"CREATE AN INTERNET SEARCH QUERY FOR THIS PROMPT: \n{user_prompt}"
-
-    client = ollama.Client(host)
-    response = client.chat(
-        model=model, messages=[system_message, {"role": "user", "content": prompt}]
-    )
-    search_query = response["message"]["content"]
-    search_query = search_query.replace('"', "")
+    content = yield _chat_request("generate_query", prompt, agent_config)
+    search_query = _clean_query(content)
+    _memo_put("generate_query", user_prompt, search_query, agent_config)
     logging.info(
         f"[+] WebSearchAgent.generate_query: Returning with value: {search_query}"
     )
     return search_query
+
+
+def _decide_and_query_steps(user_prompt, agent_config):
+    """
+    Steps of `decide_and_query`, yielding its ollama requests (see `_run_tool`)
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (bool): A boolean determination if a web search is necessary for additional context
+        search_query (str): The generated search query (empty string if no search is needed)
+    """
+    logging.info(
+        "[+] WebSearchAgent.decide_and_query: Assessing query and generating search query"
+    )
+    result = _memo_get("decide_and_query", user_prompt, agent_config)
+    if result is not None:
+        return result["search_needed"], result["query"]
+
+    # Confidently obvious prompts are decided locally, only the query is left for an SLM call
+    web_search_needed = pre_classify(user_prompt, agent_config)
+    if web_search_needed is False:
+        return False, ""
+    if web_search_needed:
+        return True, (yield from _generate_query_steps(user_prompt, agent_config))
+
+    content = yield _chat_request(
+        "decide_and_query", user_prompt, agent_config, format=DECIDE_AND_QUERY_FORMAT
+    )
+    result = _parse_decide_and_query(content)
+    if result is None:
+        logging.warning(
+            "[-] WebSearchAgent.decide_and_query: Could not parse model output, falling back to decide_to_search and generate_query"
+        )
+        if not (yield from _decide_to_search_steps(user_prompt, agent_config)):
+            return False, ""
+        return True, (yield from _generate_query_steps(user_prompt, agent_config))
+
+    web_search_needed, search_query = result
+    log_decision(user_prompt, web_search_needed, agent_config)
+    _memo_put(
+        "decide_and_query",
+        user_prompt,
+        {"search_needed": web_search_needed, "query": search_query},
+        agent_config,
+    )
+    logging.info(
+        f"[+] WebSearchAgent.decide_and_query: Returning with values: {web_search_needed}, {search_query}"
+    )
+    return web_search_needed, search_query
+
+
+def _generate_queries_steps(user_prompt, agent_config):
+    """
+    Steps of `generate_queries`, yielding its ollama requests (see `_run_tool`)
+
+    Args:
+        user_prompt (str): The user prompt being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        search_queries (list): Up to `num_queries` distinct search queries, best first
+    """
+    num_queries = agent_config["tools"]["generate_queries"].get("num_queries", 3)
+    prompt = (
+        f"CREATE {num_queries} INTERNET SEARCH QUERIES FOR THIS PROMPT: \n{user_prompt}"
+    )
+    # Keyed on the full prompt, which includes the number of queries asked for
+    search_queries = _memo_get("generate_queries", prompt, agent_config)
+    if search_queries is not None:
+        return search_queries
+
+    content = yield _chat_request(
+        "generate_queries", prompt, agent_config, format=GENERATE_QUERIES_FORMAT
+    )
+    search_queries = _parse_queries(content, num_queries)
+    if search_queries is None:
+        logging.warning(
+            "[-] WebSearchAgent.generate_queries: Could not parse model output, falling back to generate_query"
+        )
+        return [(yield from _generate_query_steps(user_prompt, agent_config))]
+
+    _memo_put("generate_queries", prompt, search_queries, agent_config)
+    logging.info(
+        f"[+] WebSearchAgent.generate_queries: Returning with values: {search_queries}"
+    )
+    return search_queries
+
+
+def _chat_request(tool, content, agent_config, **overrides):
+    """
+    Builds the ollama chat request of a tool from its config
+
+    Args:
+        tool (str): The tool name, its key under `tools` in the agent config
+        content (str): The user message content
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+        **overrides: Request fields replacing the configured ones (e.g. "format", "options", "span", "span_attrs")
+
+    Returns:
+        request (dict): The request, of format {"span", "host", "model", "messages", "options", "keep_alive", ...}
+    """
+    tool_config = agent_config["tools"][tool]
+    request = {
+        "span": tool,
+        "host": tool_config["host"],
+        "model": tool_config["model"],
+        "messages": [
+            tool_config["system_message"],
+            {"role": "user", "content": content},
+        ],
+        "options": tool_config.get("options"),
+        "keep_alive": tool_config.get("keep_alive"),
+    }
+    request.update(overrides)
+    return request
+
+
+def _split_request(request, agent_config):
+    """Splits a tool request into (host, pool config, span name, span attributes, client.chat arguments)"""
+    chat_args = dict(request)
+    host = chat_args.pop("host")
+    span_name = chat_args.pop("span")
+    span_attrs = chat_args.pop("span_attrs", {})
+    pool_config = agent_config.get("connection_pool", {}).get("ollama")
+    return host, pool_config, span_name, span_attrs, chat_args
+
+
+def _run_tool(steps, agent_config):
+    """
+    Runs a tool's steps, making every ollama request it yields with the pooled client
+
+    Tools are written once as generators that yield a request (from `_chat_request`) and receive the model's
+    response text, so memoization, parsing and fallbacks are shared by the sync and async versions.
+
+    Args:
+        steps (generator): The tool's steps, e.g. `_decide_to_search_steps(...)`
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        value: The tool's return value
+    """
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(_chat(request, agent_config))
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _async_run_tool(steps, agent_config):
+    """
+    Async counterpart of `_run_tool`, awaiting every ollama request on the running event loop
+
+    Args:
+        steps (generator): The tool's steps, e.g. `_decide_to_search_steps(...)`
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        value: The tool's return value
+    """
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await _async_chat(request, agent_config))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _chat(request, agent_config):
+    """
+    Makes a tool's ollama request
+
+    Args:
+        request (dict): The request from `_chat_request`
+        agent_config (dict): The agent class instance's configuration values, including connection pool settings
+
+    Returns:
+        content (str): The model's response text
+    """
+    host, pool_config, span_name, span_attrs, chat_args = _split_request(
+        request, agent_config
+    )
+    client = get_ollama_client(host, pool_config)
+    with span(span_name, model=chat_args["model"], **span_attrs) as record:
+        response = client.chat(**chat_args)
+        record_ollama(record, response)
+    return response["message"]["content"]
+
+
+async def _async_chat(request, agent_config):
+    """
+    Async counterpart of `_chat`
+
+    Args:
+        request (dict): The request from `_chat_request`
+        agent_config (dict): The agent class instance's configuration values, including connection pool settings
+
+    Returns:
+        content (str): The model's response text
+    """
+    host, pool_config, span_name, span_attrs, chat_args = _split_request(
+        request, agent_config
+    )
+    client = get_async_ollama_client(host, pool_config)
+    with span(span_name, model=chat_args["model"], **span_attrs) as record:
+        response = await client.chat(**chat_args)
+        record_ollama(record, response)
+    return response["message"]["content"]
+
+
+def _memo_get(tool, prompt, agent_config):
+    """
+    Looks up a memoized tool result, keyed on the tool's model, system prompt and options
+
+    Args:
+        tool (str): The tool name, its key under `tools` in the agent config
+        prompt (str): The prompt the result is keyed on
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        value: The memoized result, or None on a miss (or when memoization is disabled)
+    """
+    tool_memo = get_tool_memo(agent_config)
+    if tool_memo is None:
+        return None
+    tool_config = agent_config["tools"][tool]
+    value = tool_memo.get(
+        tool,
+        tool_config["model"],
+        tool_config["system_message"]["content"],
+        prompt,
+        options=tool_config.get("options"),
+    )
+    _log_memo(tool, tool_memo, value is not None)
+    return value
+
+
+def _memo_put(tool, prompt, value, agent_config):
+    """
+    Mutator function to memoize a tool result (no-op when memoization is disabled)
+
+    Args:
+        tool (str): The tool name, its key under `tools` in the agent config
+        prompt (str): The prompt the result is keyed on
+        value: The JSON-serializable tool result
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+    """
+    tool_memo = get_tool_memo(agent_config)
+    if tool_memo is None:
+        return
+    tool_config = agent_config["tools"][tool]
+    tool_memo.put(
+        tool,
+        tool_config["model"],
+        tool_config["system_message"]["content"],
+        prompt,
+        value,
+        options=tool_config.get("options"),
+    )
+
+
+def decide_to_search_batch(user_prompts, agent_config):
+    """
+    Determines if each of many prompts needs additional context from a web search, packing several prompts into each call
+
+    Prompts are sent `batch_size` at a time with numbered answers. Prompts whose answer could not be parsed are sent
+    again in smaller batches, up to `max_retries` times, then one at a time with `decide_to_search`.
+
+    Args:
+        user_prompts (list): The user prompts being assessed
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        web_search_needed (list): A boolean determination for each prompt, in order
+    """
+
+    batch_config = agent_config["tools"]["decide_to_search"].get("batch", {})
+    batch_size = batch_config.get("batch_size", 10)
+    max_retries = batch_config.get("max_retries", 2)
+    start_time = time.perf_counter()
+
+    # Memoized results are shared with `decide_to_search`
+    decisions = [
+        _memo_get("decide_to_search", user_prompt, agent_config)
+        for user_prompt in user_prompts
+    ]
+
+    classifier = get_classifier(agent_config)
+    if classifier is not None:
+        gate_config = agent_config["tools"]["decide_to_search"]["pre_classifier"]
+        for i, user_prompt in enumerate(user_prompts):
+            if decisions[i] is None:
+                decisions[i] = classifier.decide(
+                    user_prompt,
+                    gate_config["true_threshold"],
+                    gate_config["false_threshold"],
+                )
+        logging.warning(
+            f"[+] WebSearchAgent.decide_to_search_batch: Pre-classifier totals (SLM calls avoided: {classifier.stats['answered']}, deferred: {classifier.stats['deferred']})"
+        )
+    pending = [i for i, decision in enumerate(decisions) if decision is None]
+
+    for attempt in range(1 + max_retries):
+        if len(pending) == 0:
+            break
+        unparsed = []
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            answers = _decide_batch([user_prompts[i] for i in batch], agent_config)
+            for i, answer in zip(batch, answers):
+                if answer is None:
+                    unparsed.append(i)
+                    continue
+                decisions[i] = answer
+                log_decision(user_prompts[i], answer, agent_config)
+                _memo_put("decide_to_search", user_prompts[i], answer, agent_config)
+        if len(unparsed) > 0:
+            logging.warning(
+                f"[+] WebSearchAgent.decide_to_search_batch: Could not parse {len(unparsed)} answers (attempt {attempt + 1})"
+            )
+        pending = unparsed
+        batch_size = max(1, batch_size // 2)
+
+    # Prompts the batches never answered fall back to one call each
+    for i in pending:
+        decisions[i] = decide_to_search(user_prompts[i], agent_config)
+
+    elapsed = time.perf_counter() - start_time
+    logging.warning(
+        f"[+] WebSearchAgent.decide_to_search_batch: Classified {len(user_prompts)} prompts in {elapsed:.2f}s ({len(user_prompts) / max(elapsed, 1e-9):.1f} prompts/s, {len(pending)} single-prompt fallbacks)"
+    )
+    return decisions
+
+
+def _decide_batch(user_prompts, agent_config):
+    """
+    Runs one batched decide_to_search call
+
+    Args:
+        user_prompts (list): The user prompts in the batch
+        agent_config (dict): The agent class instance's configuration values, including tool system prompts
+
+    Returns:
+        answers (list): The parsed decision for each prompt, None where the answer could not be parsed
+    """
+    tool_config = agent_config["tools"]["decide_to_search"]
+    options = tool_config.get("options")
+    # A num_predict sized for one answer would cut the answer list short
+    if options and "num_predict" in options:
+        options = dict(
+            options,
+            num_predict=max(
+                options["num_predict"], BATCH_TOKENS_PER_ANSWER * len(user_prompts)
+            ),
+        )
+    # One line per prompt, so multi-line prompts cannot be mistaken for answers
+    numbered_prompts = "\n".join(
+        f"{n}: {' '.join(user_prompt.split())}"
+        for n, user_prompt in enumerate(user_prompts, start=1)
+    )
+    request = _chat_request(
+        "decide_to_search",
+        numbered_prompts,
+        agent_config,
+        options=options,
+        span="decide_to_search_batch",
+        span_attrs={"batch_size": len(user_prompts)},
+    )
+    request["messages"][0] = {
+        "role": "system",
+        "content": tool_config["system_message"]["content"] + BATCH_INSTRUCTIONS,
+    }
+    content = _chat(request, agent_config)
+    return _parse_batch_decisions(content, len(user_prompts))
+
+
+def _parse_batch_decisions(content, num_prompts):
+    """
+    Parses the numbered answers of a batched decide_to_search call
+
+    Args:
+        content (str): The model's response text
+        num_prompts (int): The number of prompts in the batch
+
+    Returns:
+        answers (list): The decision for each prompt, None where it is missing or answered inconsistently
+    """
+    content = re.sub(r"<think>.*?</think>", "", content, flags=re.DOTALL)
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+
+    answers = {}
+    conflicts = set()
+    for line in lines:
+        match = BATCH_ANSWER.match(line)
+        if match is None:
+            continue
+        n = int(match.group(1))
+        answer = match.group(2).lower() == "true"
+        if n < 1 or n > num_prompts:
+            continue
+        if answers.get(n, answer) != answer:
+            conflicts.add(n)
+        answers[n] = answer
+
+    # Models sometimes drop the numbers, a bare True/False line per prompt can still be matched up in order
+    if len(answers) == 0:
+        bare = [line.strip("*.- ").lower() for line in lines]
+        if len(bare) == num_prompts and all(a in ("true", "false") for a in bare):
+            return [a == "true" for a in bare]
+
+    return [
+        None if n in conflicts else answers.get(n) for n in range(1, num_prompts + 1)
+    ]
+
+
+def _parse_decision(content):
+    """
+    Parses the decide_to_search model output
+
+    Args:
+        content (str): The model's response text
+
+    Returns:
+        web_search_needed (bool): True if the model answered "True"
+    """
+    return "true" in content.lower()
+
+
+def _parse_decide_and_query(content):
+    """
+    Parses the decide_and_query model output
+
+    Args:
+        content (str): The model's response text, a JSON object of format {"search_needed": bool, "query": str}
+
+    Returns:
+        result (tuple): (web_search_needed, search_query), or None if the output is not usable
+    """
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(result, dict):
+        return None
+    web_search_needed = result.get("search_needed")
+    search_query = result.get("query")
+    if not isinstance(web_search_needed, bool) or not isinstance(search_query, str):
+        return None
+    if not web_search_needed:
+        return False, ""
+    search_query = _clean_query(search_query).strip()
+    if not search_query:
+        return None
+    return True, search_query
+
+
+def _parse_queries(content, num_queries):
+    """
+    Parses the generate_queries model output
+
+    Args:
+        content (str): The model's response text, a JSON object of format {"queries": [str, ...]}
+        num_queries (int): The most queries to keep
+
+    Returns:
+        search_queries (list): The distinct, non-empty queries in order, or None if the output is not usable
+    """
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(result, dict) or not isinstance(result.get("queries"), list):
+        return None
+    search_queries = []
+    for search_query in result["queries"]:
+        if not isinstance(search_query, str):
+            continue
+        search_query = _clean_query(search_query).strip()
+        if search_query and search_query.casefold() not in (
+            seen.casefold() for seen in search_queries
+        ):
+            search_queries.append(search_query)
+    return search_queries[:num_queries] or None
+
+
+def _clean_query(content):
+    """
+    Cleans the generate_query model output into a search query
+
+    Args:
+        content (str): The model's response text
+
+    Returns:
+        search_query (str): The search query without quotes
+    """
+    return content.replace('"', "")
+
+
+def _log_memo(tool, tool_memo, hit):
+    """
+    Logs a memoization lookup and the running hit/miss counts
+
+    Args:
+        tool (str): The tool name
+        tool_memo (ToolMemo): The shared tool result memo
+        hit (bool): Whether the lookup was a hit
+    """
+    result = "hit" if hit else "miss"
+    logging.info(
+        f"[*] WebSearchAgent.{tool}: Memo {result} (hits: {tool_memo.stats['hits']}, misses: {tool_memo.stats['misses']})"
+    )
@@ -0,0 +1,119 @@
+from pathlib import Path
+import argparse
+import json
+import random
+import statistics
+import time
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
+from classifier import SearchClassifier
+from tune_decide_to_search import test_cases
+
+agent_dir = Path(__file__).resolve().parent.parent
+
+
+def load_examples(log_paths):
+    """
+    Loads the labelled test cases and any logged model decisions
+
+    Args:
+        log_paths (list): Decision log files (JSONL of {"prompt": str, "decision": bool})
+
+    Returns:
+        examples (list): Labelled prompts of format (prompt, web_search_needed)
+    """
+    examples = [(prompt, answer == "True") for prompt, answer in test_cases]
+    for log_path in log_paths:
+        with Path(log_path).open('r') as f:
+            for line in f:
+                if line.strip():
+                    logged = json.loads(line)
+                    examples.append((logged["prompt"], logged["decision"]))
+    return examples
+
+
+def cross_validate(examples, folds, epochs):
+    """
+    Scores every example with a model trained on the other folds
+
+    Returns:
+        scores (list): (probability, label) for each example
+    """
+    shuffled = list(examples)
+    random.Random(0).shuffle(shuffled)
+    scores = []
+    for k in range(folds):
+        held_out = shuffled[k::folds]
+        training = [example for i, example in enumerate(shuffled) if i % folds != k]
+        classifier = SearchClassifier()
+        classifier.train(training, epochs=epochs)
+        scores += [(classifier.predict_proba(prompt), label) for prompt, label in held_out]
+    return scores
+
+
+def gate_report(scores, true_threshold, false_threshold):
+    """
+    Summarizes how a pair of thresholds would gate the held-out examples
+
+    Returns:
+        avoided (int): Examples answered locally (SLM calls avoided)
+        correct (int): Locally answered examples that were answered correctly
+    """
+    avoided = 0
+    correct = 0
+    for probability, label in scores:
+        if probability >= true_threshold:
+            avoided += 1
+            correct += label
+        elif probability <= false_threshold:
+            avoided += 1
+            correct += not label
+    return avoided, correct
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Train and evaluate the decide_to_search pre-classifier")
+    parser.add_argument("-l", "--logs", nargs="*", default=[], help="Decision logs to train on as well as the test cases")
+    parser.add_argument("-o", "--output", type=Path, default=agent_dir / "classifier_model.json")
+    parser.add_argument("-k", "--folds", type=int, default=5)
+    parser.add_argument("-e", "--epochs", type=int, default=100)
+    parser.add_argument("--true-threshold", type=float, default=0.9)
+    parser.add_argument("--false-threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    examples = load_examples(args.logs)
+    positives = sum(label for _, label in examples)
+    print(f"[+] {len(examples)} labelled prompts ({positives} True, {len(examples) - positives} False)")
+
+    scores = cross_validate(examples, args.folds, args.epochs)
+
+    print("\n" + "="*60)
+    print(f"PRE-CLASSIFIER GATE ({args.folds}-fold cross-validation)")
+    print("="*60)
+    print(f"\n{'true >=':>8} {'false <=':>9} {'SLM calls avoided':>20} {'accuracy when answered':>24}")
+    sweep = sorted({(args.true_threshold, args.false_threshold), (0.95, 0.05), (0.9, 0.1), (0.8, 0.2), (0.7, 0.3)}, reverse=True)
+    for true_threshold, false_threshold in sweep:
+        avoided, correct = gate_report(scores, true_threshold, false_threshold)
+        accuracy = f"{correct}/{avoided} ({100*correct/avoided:.1f}%)" if avoided else "-"
+        marker = "  <- selected" if (true_threshold, false_threshold) == (args.true_threshold, args.false_threshold) else ""
+        print(f"{true_threshold:8.2f} {false_threshold:9.2f} {avoided:>8}/{len(scores)} ({100*avoided/len(scores):5.1f}%) {accuracy:>24}{marker}")
+
+    classifier = SearchClassifier()
+    classifier.train(examples, epochs=args.epochs)
+
+    # Per-prompt latency of the gate
+    prompts = [prompt for prompt, _ in examples]
+    times = []
+    for _ in range(20):
+        for prompt in prompts:
+            start_time = time.perf_counter()
+            classifier.decide(prompt, args.true_threshold, args.false_threshold)
+            times.append(time.perf_counter() - start_time)
+    print(f"\nGate latency: median {1e6*statistics.median(times):.1f}us, max {1e6*max(times):.1f}us per prompt")
+
+    classifier.save(args.output)
+    print(f"Saved model trained on all {len(examples)} prompts to {args.output}")
+    print("="*60 + "\n")
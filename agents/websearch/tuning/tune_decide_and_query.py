@@ -0,0 +1,109 @@
+from pathlib import Path
+import argparse
+import logging
+import yaml
+import time
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
+from tools import *
+from tune_decide_to_search import test_cases, print_summary
+
+
+class FallbackCounter(logging.Handler):
+    """Counts decide_and_query calls whose output could not be parsed"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if "decide_and_query: Could not parse" in record.getMessage():
+            self.count += 1
+
+
+def fused_case(user_prompt, agent_config):
+    """Decision and query from one decide_and_query call"""
+    return decide_and_query(user_prompt, agent_config)
+
+
+def pair_case(user_prompt, agent_config):
+    """Decision from decide_to_search, then the query from generate_query when a search is needed"""
+    if not decide_to_search(user_prompt, agent_config):
+        return False, ""
+    return True, generate_query(user_prompt, agent_config)
+
+
+def epoch(n, mode, run_case, agent_config):
+    results = []
+    times = []
+    queries = []
+    for i, test_case in enumerate(test_cases):
+
+        print(f"[+] {mode} epoch {n}, testing use case #{i}")
+        correct_result = test_case[1] == "True"
+
+        start_time = time.time()
+        search_needed, search_query = run_case(test_case[0], agent_config)
+        times.append(time.time() - start_time)
+        results.append(int(search_needed == correct_result))
+        queries.append(search_query)
+
+    return results, times, queries
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Compare the fused decide_and_query tool with decide_to_search + generate_query")
+    parser.add_argument("-e", "--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Load agent config
+    active_dir = Path(__file__).resolve().parent
+    config_data_path = active_dir / "agent_config_tuning.yaml"
+    with config_data_path.open('r') as f:
+        agent_config = yaml.safe_load(f)
+
+    fallbacks = FallbackCounter()
+    logging.getLogger().addHandler(fallbacks)
+
+    runs = {}
+    for mode, run_case in (("fused", fused_case), ("pair", pair_case)):
+        all_results = []
+        all_times = []
+        all_queries = []
+        for n in range(args.epochs):
+            results, times, queries = epoch(n, mode, run_case, agent_config)
+            all_results.append(results)
+            all_times.append(times)
+            all_queries.append(queries)
+        runs[mode] = (all_results, all_times, all_queries)
+
+        # Times are per prompt: the decision plus, when a search is needed, the query
+        print(f"\n{mode.upper()} (times include the query generation when a search is needed)")
+        print_summary(all_results, all_times)
+
+    print("="*60)
+    print("FUSED VS PAIR")
+    print("="*60)
+    for mode, (all_results, all_times, _) in runs.items():
+        total_prompts = len(test_cases) * args.epochs
+        correct = sum(sum(results) for results in all_results)
+        mean_time = sum(sum(times) for times in all_times) / total_prompts
+        print(f"  {mode:6} {mean_time:7.3f}s per prompt   accuracy {correct}/{total_prompts} ({100*correct/total_prompts:.1f}%)")
+    total = len(test_cases) * args.epochs
+    print(f"  Fused outputs that fell back to the pair: {fallbacks.count}/{total}")
+    speedup = sum(sum(times) for times in runs["pair"][1]) / sum(sum(times) for times in runs["fused"][1])
+    print(f"  Fused speedup: {speedup:.1f}x")
+
+    # Queries have no ground truth, so the last epoch's queries are listed side by side for review
+    print("\nQueries (last epoch, prompts where either path searched):")
+    for i, test_case in enumerate(test_cases):
+        fused_query = runs["fused"][2][-1][i]
+        pair_query = runs["pair"][2][-1][i]
+        if fused_query or pair_query:
+            print(f"  {test_case[0]}")
+            print(f"    fused: {fused_query or '-'}")
+            print(f"    pair:  {pair_query or '-'}")
+    print("="*60 + "\n")
@@ -5,6 +5,7 @@ import statistics
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
 from tools import *
 
 test_cases = [
@@ -72,7 +73,7 @@ def epoch(n, agent_config):
         
         print(f"[+] Epoch {n}, testing use case #{i}")
         user_prompt = test_case[0]
-        correct_result = bool(test_case[1])
+        correct_result = test_case[1] == "True"
 
         start_time = time.time()
         result = decide_to_search(user_prompt, agent_config)
@@ -85,25 +86,14 @@ def epoch(n, agent_config):
         
     return results, times
 
-if __name__ == '__main__':
-
-    # Load agent config
-    active_dir = Path(__file__).resolve().parent
-    config_data_path = active_dir / "agent_config_tuning.yaml"
-    with config_data_path.open('r') as f:
-        agent_config = yaml.safe_load(f)
-
-    # Test-specific changes to agent config
-    # agent_config["tools"]["decide_to_search"]["model"] = "llama3.1:8b"
-
-    all_results = []
-    all_times = []
-
-    for n in range(5):
-        results, times = epoch(n, agent_config)
-        all_results.append(results)
-        all_times.append(times)
+def print_summary(all_results, all_times):
+    """
+    Prints the accuracy and timing summary of a tuning run
 
+    Args:
+        all_results (list): Per-epoch lists of 1 (correct) / 0 (incorrect), in test case order
+        all_times (list): Per-epoch lists of decide_to_search call times in seconds, in test case order
+    """
     print("\n" + "="*60)
     print("PERFORMANCE SUMMARY")
     print("="*60)
@@ -163,6 +153,27 @@ if __name__ == '__main__':
 
     print("="*60 + "\n")
 
+if __name__ == '__main__':
+
+    # Load agent config
+    active_dir = Path(__file__).resolve().parent
+    config_data_path = active_dir / "agent_config_tuning.yaml"
+    with config_data_path.open('r') as f:
+        agent_config = yaml.safe_load(f)
+
+    # Test-specific changes to agent config
+    # agent_config["tools"]["decide_to_search"]["model"] = "llama3.1:8b"
+
+    all_results = []
+    all_times = []
+
+    for n in range(5):
+        results, times = epoch(n, agent_config)
+        all_results.append(results)
+        all_times.append(times)
+
+    print_summary(all_results, all_times)
+
 
 """
 Gen 0 prompt:
@@ -0,0 +1,95 @@
+from pathlib import Path
+import argparse
+import yaml
+import time
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
+from tools import *
+from tune_decide_to_search import test_cases, print_summary
+
+
+def batch_epoch(agent_config):
+    """
+    Classifies every test case with decide_to_search_batch
+
+    Returns:
+        decisions (list): The decision for each test case
+        seconds (float): The wall time of the whole epoch
+    """
+    start_time = time.time()
+    decisions = decide_to_search_batch([test_case[0] for test_case in test_cases], agent_config)
+    return decisions, time.time() - start_time
+
+
+def single_epoch(agent_config):
+    """
+    Classifies every test case with one decide_to_search call each
+
+    Returns:
+        decisions (list): The decision for each test case
+        seconds (float): The wall time of the whole epoch
+    """
+    start_time = time.time()
+    decisions = [decide_to_search(test_case[0], agent_config) for test_case in test_cases]
+    return decisions, time.time() - start_time
+
+
+def score(decisions):
+    """Marks each decision 1 (correct) or 0 (incorrect) against the test cases"""
+    return [int(decision == (test_case[1] == "True")) for decision, test_case in zip(decisions, test_cases)]
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Compare batched and single-prompt decide_to_search")
+    parser.add_argument("-b", "--batch-size", type=int, help="Prompts per call (overrides config)")
+    parser.add_argument("-e", "--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Load agent config
+    active_dir = Path(__file__).resolve().parent
+    config_data_path = active_dir / "agent_config_tuning.yaml"
+    with config_data_path.open('r') as f:
+        agent_config = yaml.safe_load(f)
+    if args.batch_size is not None:
+        agent_config["tools"]["decide_to_search"].setdefault("batch", {})["batch_size"] = args.batch_size
+
+    runs = {}
+    for mode, run_epoch in (("batched", batch_epoch), ("single", single_epoch)):
+        all_decisions = []
+        all_seconds = []
+        for n in range(args.epochs):
+            print(f"[+] {mode} epoch {n}")
+            decisions, seconds = run_epoch(agent_config)
+            all_decisions.append(decisions)
+            all_seconds.append(seconds)
+        runs[mode] = (all_decisions, all_seconds)
+
+        # Batched calls have no per-prompt time, so every prompt is given its share of the epoch's wall time
+        print(f"\n{mode.upper()} (per-prompt times are the epoch time / {len(test_cases)} prompts)")
+        print_summary(
+            [score(decisions) for decisions in all_decisions],
+            [[seconds / len(test_cases)] * len(test_cases) for seconds in all_seconds],
+        )
+
+    print("="*60)
+    print("BATCHED VS SINGLE-PROMPT")
+    print("="*60)
+    for mode, (all_decisions, all_seconds) in runs.items():
+        total_prompts = len(test_cases) * len(all_seconds)
+        correct = sum(sum(score(decisions)) for decisions in all_decisions)
+        print(f"  {mode:8} {total_prompts / sum(all_seconds):7.2f} prompts/s   accuracy {correct}/{total_prompts} ({100*correct/total_prompts:.1f}%)")
+
+    # How often the batched path gives the same answer as the single-prompt path for the same prompt and epoch
+    agree = sum(
+        int(b == s)
+        for batched, single in zip(runs["batched"][0], runs["single"][0])
+        for b, s in zip(batched, single)
+    )
+    total = len(test_cases) * args.epochs
+    print(f"  Agreement with single-prompt answers: {agree}/{total} ({100*agree/total:.1f}%)")
+    speedup = sum(runs["single"][1]) / sum(runs["batched"][1])
+    print(f"  Batched speedup: {speedup:.1f}x")
+    print("="*60 + "\n")
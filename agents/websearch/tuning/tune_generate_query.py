@@ -6,6 +6,7 @@ import statistics
 
 # Add parent to path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
 
 from tools import *
 
@@ -0,0 +1,198 @@
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import deepcopy
+import argparse
+import itertools
+import json
+import queue
+import statistics
+import time
+import yaml
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # repo root, for core/
+from tools import *
+from tune_decide_to_search import test_cases, print_summary
+
+active_dir = Path(__file__).resolve().parent
+
+
+def build_configurations(grid, agent_config):
+    """
+    Expands the grid into one agent config per (model, system prompt, options) combination
+
+    Args:
+        grid (dict): The grid file contents
+        agent_config (dict): The base tuning agent config
+
+    Returns:
+        configurations (dict): {configuration name: agent config}
+    """
+    configurations = {}
+    prompts = grid["system_prompts"]
+    for model, prompt_name, options in itertools.product(grid["models"], prompts, grid["options"]):
+        config = deepcopy(agent_config)
+        tool_config = config["tools"]["decide_to_search"]
+        tool_config["model"] = model
+        if prompts[prompt_name] is not None:
+            tool_config["system_message"] = {"role": "system", "content": prompts[prompt_name]}
+        tool_config["options"] = options or None
+        name = f"{model} | {prompt_name} | {json.dumps(options or {}, sort_keys=True)}"
+        configurations[name] = config
+    return configurations
+
+
+def load_done(output_path):
+    """
+    Loads the results of an earlier (possibly interrupted) run
+
+    Args:
+        output_path (Path): The JSONL results file
+
+    Returns:
+        done (dict): {(configuration name, epoch, test case index): result line}
+    """
+    done = {}
+    if not output_path.exists():
+        return done
+    with output_path.open('r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by the interruption
+            done[(result["config"], result["epoch"], result["case"])] = result
+    return done
+
+
+def run_case(name, config, n, i, host_slots):
+    """
+    Runs one test case for one configuration on the next free host
+
+    Args:
+        name (str): The configuration name
+        config (dict): The configuration's agent config
+        n (int): The epoch
+        i (int): The test case index
+        host_slots (queue.Queue): Free request slots, one entry (host URL) per request a host may have in flight
+
+    Returns:
+        result (dict): The result line written to the JSONL file
+    """
+    user_prompt, expected = test_cases[i]
+    host = host_slots.get()
+    try:
+        config = dict(config, tools=dict(config["tools"]))
+        config["tools"]["decide_to_search"] = dict(config["tools"]["decide_to_search"], host=host)
+        start_time = time.time()
+        result = decide_to_search(user_prompt, config)
+        seconds = time.time() - start_time
+    finally:
+        host_slots.put(host)
+    return {
+        "config": name,
+        "epoch": n,
+        "case": i,
+        "host": host,
+        "result": result,
+        "correct": int(result == (expected == "True")),
+        "seconds": seconds,
+    }
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Evaluate a grid of decide_to_search configurations concurrently")
+    parser.add_argument("-g", "--grid", type=Path, default=active_dir / "grid_decide_to_search.yaml")
+    parser.add_argument("-o", "--output", type=Path, default=active_dir / "grid_decide_to_search_results.jsonl", help="JSONL results file, an existing file is resumed")
+    parser.add_argument("-c", "--concurrency", type=int, help="Requests in flight per host (overrides grid file)")
+    parser.add_argument("--hosts", nargs="+", help="Ollama hosts (overrides grid file)")
+    parser.add_argument("-e", "--epochs", type=int, help="Epochs per configuration (overrides grid file)")
+    args = parser.parse_args()
+
+    with (active_dir / "agent_config_tuning.yaml").open('r') as f:
+        agent_config = yaml.safe_load(f)
+    with args.grid.open('r') as f:
+        grid = yaml.safe_load(f)
+
+    hosts = args.hosts or grid["hosts"]
+    concurrency = args.concurrency or grid["concurrency"]
+    epochs = args.epochs or grid["epochs"]
+    # Keep enough pooled connections per host for every request in flight
+    agent_config["connection_pool"] = {"ollama": {"pool_size": concurrency}}
+    configurations = build_configurations(grid, agent_config)
+
+    done = load_done(args.output)
+    jobs = [
+        (name, n, i)
+        for name in configurations
+        for n in range(epochs)
+        for i in range(len(test_cases))
+        if (name, n, i) not in done
+    ]
+    total = len(configurations) * epochs * len(test_cases)
+    print(f"[+] {len(configurations)} configurations x {epochs} epochs x {len(test_cases)} test cases: {total - len(jobs)} done, {len(jobs)} to run on {len(hosts)} hosts")
+
+    host_slots = queue.Queue()
+    for host in hosts:
+        for _ in range(concurrency):
+            host_slots.put(host)
+
+    start_time = time.time()
+    failed = 0
+    with args.output.open('a') as f, ThreadPoolExecutor(max_workers=concurrency * len(hosts)) as executor:
+        futures = [executor.submit(run_case, name, configurations[name], n, i, host_slots) for name, n, i in jobs]
+        try:
+            for count, future in enumerate(as_completed(futures), start=1):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[-] Request failed: {e}")
+                    continue
+                done[(result["config"], result["epoch"], result["case"])] = result
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                if count % 50 == 0 or count == len(jobs):
+                    elapsed = time.time() - start_time
+                    print(f"[+] {count}/{len(jobs)} requests ({count / elapsed:.1f}/s)")
+        except KeyboardInterrupt:
+            print("\n[-] Interrupted, rerun to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            sys.exit(1)
+
+    if len(jobs) > 0:
+        elapsed = time.time() - start_time
+        print(f"\n[+] Ran {len(jobs) - failed} requests in {elapsed:.1f}s ({(len(jobs) - failed) / elapsed:.1f} requests/s), {failed} failed")
+
+    ranking = []
+    for name in configurations:
+        all_results = []
+        all_times = []
+        for n in range(epochs):
+            epoch_results = [done.get((name, n, i)) for i in range(len(test_cases))]
+            if None in epoch_results:
+                continue  # failed requests, rerun to fill in
+            all_results.append([r["correct"] for r in epoch_results])
+            all_times.append([r["seconds"] for r in epoch_results])
+        if len(all_results) == 0:
+            print(f"\n[-] No complete epochs for {name}")
+            continue
+
+        print("\n" + "#"*60)
+        print(f"CONFIGURATION: {name}")
+        print("#"*60)
+        print_summary(all_results, all_times)
+        flat_results = [r for epoch_results in all_results for r in epoch_results]
+        flat_times = [t for epoch_times in all_times for t in epoch_times]
+        ranking.append((sum(flat_results) / len(flat_results), statistics.median(flat_times), name))
+
+    print("="*60)
+    print("GRID RANKING")
+    print("="*60)
+    for accuracy, median_time, name in sorted(ranking, key=lambda r: (-r[0], r[1])):
+        print(f"  {100*accuracy:5.1f}%  {median_time:6.3f}s median  {name}")
+    print("="*60 + "\n")
@@ -1,37 +1,679 @@
+import asyncio
+import contextvars
+import functools
+import json
 import logging
+import math
+import re
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from copy import deepcopy
+from urllib.parse import quote_plus
 
-import requests
 from bs4 import BeautifulSoup
-from trafilatura import extract, fetch_url
+from lxml import etree
+from trafilatura import extract, fetch_response
+from trafilatura.downloads import DEFAULT_HEADERS as TRF_HEADERS
+from trafilatura.downloads import Response
 from trafilatura.settings import DEFAULT_CONFIG as TRF_CONFIG
+from trafilatura.settings import Extractor
+from trafilatura.utils import is_acceptable_length
 
+from core.clients import get_async_http_client, get_http_session
+from core.tracing import span
 
-def searxng_search(query, agent_config):
+from .cache import STOP_WORDS, get_page_cache, get_search_cache, normalize_url
+from .dedupe import get_deduper
+from .extraction import get_extraction_pool
+from .health import get_domain_health
+
+# Characters of a SearXNG results page fed to the incremental lxml parser at a time
+HTML_FEED_CHARS = 16384
+# Bytes of a page read at a time while downloading, to stop at trafilatura's MAX_FILE_SIZE
+DOWNLOAD_CHUNK_BYTES = 2**17
+# Least seconds given to the SearXNG request once the search deadline has (nearly) passed, the snippets are the fallback
+MIN_SEARCH_TIMEOUT = 1.0
+
+
+def searxng_search(query, agent_config, results=None, deadline=None):
     """
     Executes query on SearXNG and returns top results
 
+    Once the deadline passes, the pages scraped so far are returned, or the result snippets if no page finished.
+
     Args:
-        query (str): The search query to be run
+        query (str|list): The search query to be run, or alternative queries to run at once (see `_fanout_results`)
         agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        results (list, default=None): Already fetched search results (e.g. from `search_snippets`) to scrape instead of running the query again
+        deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
 
     Returns:
         web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}
     """
 
-    num_search_results = agent_config["workers"]["searxng_search"]["num_search_results"]
     num_sites_scraped = agent_config["workers"]["searxng_search"]["num_sites_scraped"]
     max_scrape_tries = agent_config["workers"]["searxng_search"]["max_scrape_tries"]
 
+    if results is None:
+        results = _fanout_results(query, agent_config, deadline)
+
+    # Call scrape_webpage to get `num_sites_scraped` page results, trying up to `max_scrape_tries` differnet pages.
+    candidates = _order_candidates(results, agent_config)[:max_scrape_tries]
+    scrape_mode = agent_config["workers"]["searxng_search"].get(
+        "scrape_mode", "sequential"
+    )
+    deduper = get_deduper(agent_config)
+    if scrape_mode == "concurrent":
+        web_contexts = _scrape_concurrent(
+            candidates, num_sites_scraped, agent_config, deduper, deadline
+        )
+    elif scrape_mode == "hedged":
+        web_contexts = _scrape_hedged(
+            candidates,
+            num_sites_scraped,
+            agent_config,
+            deduper,
+            deadline,
+            num_sites_scraped,
+            agent_config["workers"]["searxng_search"].get("hedge_delay"),
+        )
+    elif deadline is not None:
+        # One page at a time as in "sequential", but without blocking past the deadline
+        web_contexts = _scrape_hedged(
+            candidates, num_sites_scraped, agent_config, deduper, deadline, 1
+        )
+    else:
+        web_contexts = _scrape_sequential(
+            candidates, num_sites_scraped, agent_config, deduper
+        )
+    return _finish_search(web_contexts, candidates, deduper, deadline, agent_config)
+
+
+def search_snippets(query, agent_config, deadline=None):
+    """
+    Executes query on SearXNG and returns the result titles and snippets as context, without scraping any pages
+
+    Args:
+        query (str|list): The search query to be run, or alternative queries to run at once (see `_fanout_results`)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{snippet}"}
+        results (list): The parsed search results, so the caller can escalate to `searxng_search` without searching again
+    """
+    results = _fanout_results(query, agent_config, deadline)
+    return _snippet_contexts(results), results
+
+
+def _snippet_contexts(results):
+    """
+    Turns parsed search results into snippet-only web contexts
+
+    Args:
+        results (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{snippet}"}
+    """
+    return [
+        {
+            "name": result["title"],
+            "url": result["link"],
+            "context": result["search_description"],
+        }
+        for result in results
+        if result["search_description"] != "No description available"
+    ]
+
+
+def select_passages(web_contexts, user_prompt, search_query, agent_config):
+    """
+    Trims scraped pages down to the passages most relevant to the prompt, within a character budget
+
+    Each page is split into passages, and all passages are scored together with BM25 against the user prompt and the
+    generated search query. The best passages are kept until `max_context_chars` is reached, and each page keeps its
+    selected passages in their original order. Pages with no selected passages are dropped.
+
+    Args:
+        web_contexts (list): The `searxng_search` results of format {"name": "{name}", "url": "{url}", "context": "{page content}"}
+        user_prompt (str): The user prompt the context is for
+        search_query (str): The generated search query
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        web_contexts (list): The pages with their context trimmed to the selected passages
+    """
+    passage_chars = agent_config["workers"]["select_passages"]["passage_chars"]
+    max_context_chars = agent_config["workers"]["select_passages"]["max_context_chars"]
+    k1 = agent_config["workers"]["select_passages"].get("k1", 1.5)
+    b = agent_config["workers"]["select_passages"].get("b", 0.75)
+
+    # (page index, passage index, text, term counts) for every passage of every page
+    passages = []
+    for page_index, web_data in enumerate(web_contexts):
+        for passage_index, text in enumerate(
+            _split_passages(web_data["context"], passage_chars)
+        ):
+            passages.append((page_index, passage_index, text, Counter(_tokenize(text))))
+    if len(passages) == 0:
+        return web_contexts
+
+    # BM25 over the pooled passages
+    document_frequency = Counter()
+    for passage in passages:
+        document_frequency.update(passage[3].keys())
+    average_length = sum(sum(p[3].values()) for p in passages) / len(passages)
+    query_terms = set(_tokenize(f"{user_prompt} {search_query}"))
+
+    scores = []
+    for passage in passages:
+        term_counts = passage[3]
+        length = sum(term_counts.values())
+        score = 0.0
+        for term in query_terms:
+            frequency = term_counts.get(term, 0)
+            if frequency == 0:
+                continue
+            idf = math.log(
+                1
+                + (len(passages) - document_frequency[term] + 0.5)
+                / (document_frequency[term] + 0.5)
+            )
+            score += (
+                idf
+                * frequency
+                * (k1 + 1)
+                / (frequency + k1 * (1 - b + b * length / average_length))
+            )
+        scores.append(score)
+
+    # Greedily keep the best passages that fit in the budget, ties keep search rank order.
+    # Passages sharing no terms with the prompt are only used if nothing else matched.
+    selected = set()
+    used_chars = 0
+    for i in sorted(range(len(passages)), key=lambda i: -scores[i]):
+        if scores[i] == 0 and len(selected) > 0:
+            break
+        text = passages[i][2]
+        if used_chars + len(text) > max_context_chars:
+            continue
+        selected.add(i)
+        used_chars += len(text)
+
+    trimmed = []
+    for page_index, web_data in enumerate(web_contexts):
+        texts = [
+            passage[2]
+            for i, passage in enumerate(passages)
+            if passage[0] == page_index and i in selected
+        ]
+        if len(texts) > 0:
+            trimmed.append({**web_data, "context": "\n\n".join(texts)})
+
+    original_chars = sum(len(web_data["context"]) for web_data in web_contexts)
+    logging.info(
+        f"[*] WebSearchAgent.select_passages: Kept {len(selected)}/{len(passages)} passages ({used_chars}/{original_chars} characters)"
+    )
+    return trimmed
+
+
+def _split_passages(text, passage_chars):
+    """
+    Splits page text into passages of roughly `passage_chars` characters along paragraph boundaries
+
+    Args:
+        text (str): The page text
+        passage_chars (int): The target passage size
+
+    Returns:
+        passages (list): The passages, in page order
+    """
+    passages = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Hard-split paragraphs that are longer than a passage on their own
+        while len(paragraph) > passage_chars:
+            cut = paragraph.rfind(" ", 0, passage_chars)
+            cut = cut if cut > 0 else passage_chars
+            if current:
+                passages.append(current)
+                current = ""
+            passages.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if current and len(current) + len(paragraph) + 2 > passage_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        passages.append(current)
+    return passages
+
+
+def _tokenize(text):
+    """
+    Lowercases text and splits it into word tokens, without stop words
+
+    Args:
+        text (str): The text to tokenize
+
+    Returns:
+        tokens (list): The word tokens
+    """
+    return [
+        token for token in re.findall(r"\w+", text.lower()) if token not in STOP_WORDS
+    ]
+
+
+def _fanout_results(query, agent_config, deadline=None):
+    """
+    Runs one search query, or several alternative queries against SearXNG at once with their results fused
+
+    A query that fails is left out of the fusion, the search only fails if every query does.
+
+    Args:
+        query (str|list): The search query to be run, or a list of alternative queries
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by, caps the request timeouts
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    if isinstance(query, str):
+        return _search_results(query, agent_config, deadline)
+    if len(query) == 1:
+        return _search_results(query[0], agent_config, deadline)
+
+    executor = ThreadPoolExecutor(max_workers=len(query))
+    try:
+        # Each search runs in a copy of the caller's context so its spans land in the caller's trace
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _search_results,
+                search_query,
+                agent_config,
+                deadline,
+            )
+            for search_query in query
+        ]
+        result_lists = []
+        for future in futures:
+            try:
+                result_lists.append(future.result())
+            except Exception as e:
+                result_lists.append(e)
+    finally:
+        executor.shutdown(wait=False)
+    return _fuse_results(query, result_lists, agent_config)
+
+
+def _fuse_results(queries, result_lists, agent_config):
+    """
+    Merges the results of alternative queries by URL and ranks them with reciprocal rank fusion
+
+    Each result scores 1 / (`rrf_k` + rank) for every query that returned it, so pages several queries agree on rise
+    above pages only one query ranked highly.
+
+    Args:
+        queries (list): The alternative search queries
+        result_lists (list): Each query's parsed search results, or the exception its search raised
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        results (list): The top `num_search_results` fused results, re-ranked from 1 like the search parsers number them
+    """
+    failures = [
+        result_list
+        for result_list in result_lists
+        if isinstance(result_list, Exception)
+    ]
+    if len(failures) == len(result_lists):
+        raise failures[0]
+    for search_query, result_list in zip(queries, result_lists):
+        if isinstance(result_list, Exception):
+            logging.warning(
+                f"[-] WebSearchAgent.searxng_search: Fan-out query failed, fusing the others: {search_query}"
+            )
+
+    rrf_k = agent_config["workers"]["searxng_search"].get("rrf_k", 60)
+    scores = Counter()
+    fused = {}  # normalized url -> result, from the query that ranked it highest
+    best_rank = {}
+    for result_list in result_lists:
+        if isinstance(result_list, Exception):
+            continue
+        for rank, result in enumerate(result_list):
+            key = normalize_url(result["link"])
+            scores[key] += 1 / (rrf_k + rank + 1)
+            if key not in fused or rank < best_rank[key]:
+                fused[key] = result
+                best_rank[key] = rank
+
+    num_search_results = agent_config["workers"]["searxng_search"]["num_search_results"]
+    ranked = sorted(scores, key=lambda key: (-scores[key], best_rank[key]))
+    logging.info(
+        f"[*] WebSearchAgent.searxng_search: Fused {len(scores)} unique results from {len(result_lists) - len(failures)} queries"
+    )
+    return [
+        {**fused[key], "id": rank}
+        for rank, key in enumerate(ranked[:num_search_results], start=1)
+    ]
+
+
+def _search_results(query, agent_config, deadline=None):
+    """
+    Runs a query on SearXNG and parses the top results, using the results cache when enabled
+
+    Args:
+        query (str): The search query to be run
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by, caps the request timeout
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    return _run_steps(_search_steps(query, agent_config, deadline), agent_config)
+
+
+def _search_steps(query, agent_config, deadline=None):
+    """
+    Steps of `_search_results`, yielding its SearXNG request and parse (see `_run_steps`)
+
+    Args:
+        query (str): The search query to be run
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by, caps the request timeout
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    search_cache = get_search_cache(agent_config)
+    if search_cache is not None:
+        results = search_cache.get(query)
+        if results is not None:
+            logging.debug(
+                f"[*] WebSearchAgent.searxng_search: Results cache hit for query: {query}"
+            )
+            return results
+
+    num_search_results = agent_config["workers"]["searxng_search"]["num_search_results"]
+
     headers = agent_config["workers"]["searxng_search"]["search_headers"]
-    url = f"{agent_config['workers']['searxng_search']['url']}{query}"
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
+    url = _search_url(query, agent_config)
+    pool_config = agent_config.get("connection_pool", {}).get("searxng", {})
+    with span("searxng_request"):
+        status, text = yield (
+            "search",
+            url,
+            headers,
+            pool_config,
+            _search_timeout(pool_config, deadline),
+        )
     logging.debug(
-        f"[*] WebSearchAgent.searxng_search: Web search returned status: {response.status_code}"
+        f"[*] WebSearchAgent.searxng_search: Web search returned status: {status}"
+    )
+
+    with span("searxng_parse"):
+        results = yield (
+            "call",
+            functools.partial(
+                _parse_search_response, text, num_search_results, agent_config
+            ),
+        )
+
+    if search_cache is not None:
+        search_cache.put(query, results)
+    return results
+
+
+def _search_timeout(pool_config, deadline):
+    """
+    Returns the SearXNG request timeout, capped by the search deadline
+
+    Args:
+        pool_config (dict): The SearXNG connection pool settings
+        deadline (float): `time.monotonic()` time the search must finish by (None for no deadline)
+
+    Returns:
+        timeout (float): Seconds, at least MIN_SEARCH_TIMEOUT when there is a deadline
+    """
+    timeout = _time_left(deadline, pool_config.get("timeout"))
+    if deadline is None:
+        return timeout
+    return max(timeout, MIN_SEARCH_TIMEOUT)
+
+
+def _time_left(deadline, timeout=None):
+    """
+    Returns the seconds until the search deadline
+
+    Args:
+        deadline (float): `time.monotonic()` time the search must finish by (None for no deadline)
+        timeout (float, default=None): An upper bound on the result
+
+    Returns:
+        seconds (float): The seconds left (never negative), capped at `timeout`, or `timeout` when there is no deadline
+    """
+    if deadline is None:
+        return timeout
+    seconds = max(0.0, deadline - time.monotonic())
+    return seconds if timeout is None else min(seconds, timeout)
+
+
+def _apply_deadline(web_contexts, candidates, deadline):
+    """
+    Falls back to the search result snippets when the deadline passed before any page was scraped
+
+    Args:
+        web_contexts (list): The scraped pages
+        candidates (list): The search results that were scraped
+        deadline (float): `time.monotonic()` time the search must finish by (None for no deadline)
+
+    Returns:
+        web_contexts (list): The scraped pages, or snippet contexts
+    """
+    if deadline is None or time.monotonic() < deadline:
+        return web_contexts
+    if len(web_contexts) > 0:
+        logging.warning(
+            f"[-] WebSearchAgent.searxng_search: Search deadline passed, continuing with {len(web_contexts)} scraped pages"
+        )
+        return web_contexts
+    logging.warning(
+        "[-] WebSearchAgent.searxng_search: Search deadline passed before any page was scraped, using result snippets"
     )
+    return _snippet_contexts(candidates)
+
+
+def _order_candidates(results, agent_config):
+    """
+    Puts search results from healthy domains first and drops domains whose circuit is open, when domain health is enabled
+
+    Args:
+        results (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        results (list): The results in the order they should be scraped
+    """
+    domain_health = get_domain_health(agent_config)
+    if domain_health is None:
+        return results
+    return domain_health.order(results)
+
+
+def _record_health(domain_health, url, started, contents):
+    """
+    Records a page fetch in the domain health store
+
+    Args:
+        domain_health (DomainHealth): The domain health store (None when disabled)
+        url (str): The page URL
+        started (float): `time.monotonic()` time the fetch started at
+        contents (str): The extracted page text (None if the fetch or extraction failed)
+    """
+    if domain_health is not None:
+        domain_health.record(url, time.monotonic() - started, contents)
+
+
+def _page_stores(agent_config):
+    """
+    Opens (on first use) the stores a page scrape reads and updates
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        page_cache (PageCache): The page cache (None when disabled)
+        domain_health (DomainHealth): The domain health store (None when disabled)
+    """
+    return get_page_cache(agent_config), get_domain_health(agent_config)
+
+
+def _search_url(query, agent_config):
+    """
+    Builds the SearXNG request URL for the configured search backend
+
+    Args:
+        query (str): The search query to be run
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        url (str): The SearXNG request URL
+    """
+    # Encoded, so "#", "&" or "+" in a query cannot end it early or add parameters
+    url = f"{agent_config['workers']['searxng_search']['url']}{quote_plus(query)}"
+    if agent_config["workers"]["searxng_search"].get("backend", "html") == "json":
+        url += "&format=json"
+    return url
+
+
+def _parse_search_response(text, num_search_results, agent_config):
+    """
+    Parses a SearXNG response with the configured search backend and HTML parser
+
+    Args:
+        text (str): The SearXNG response body
+        num_search_results (int): The number of results to parse
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    if agent_config["workers"]["searxng_search"].get("backend", "html") == "json":
+        return _parse_search_json(text, num_search_results)
+    if agent_config["workers"]["searxng_search"].get("html_parser", "lxml") == "lxml":
+        return _parse_search_html_lxml(text, num_search_results)
+    return _parse_search_html(text, num_search_results)
+
+
+def _parse_search_json(text, num_search_results):
+    """
+    Parses the top results out of a SearXNG JSON API response (`format=json`)
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    Args:
+        text (str): The SearXNG JSON response
+        num_search_results (int): The number of results to parse
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    results = []
+    for i, result in enumerate(json.loads(text)["results"], start=1):
+        if i > num_search_results:
+            break
+        if not result.get("url"):
+            continue
+        results.append(
+            {
+                "id": i,
+                "title": (result.get("title") or "").strip(),
+                "link": result["url"],
+                "search_description": (result.get("content") or "").strip()
+                or "No description available",
+            }
+        )
+    return results
+
+
+def _parse_search_html_lxml(html, num_search_results):
+    """
+    Parses the top results out of a SearXNG results page with lxml's incremental HTML parser
+
+    The page is fed to the parser in chunks and parsing stops once `num_search_results` results have been read, so the
+    rest of the page is never parsed.
+
+    Args:
+        html (str): The SearXNG results page HTML
+        num_search_results (int): The number of results to parse
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag="article")
+    results = []
+    i = 0
+    for start in range(0, len(html) + 1, HTML_FEED_CHARS):
+        if start < len(html):
+            parser.feed(html[start : start + HTML_FEED_CHARS])
+        else:
+            parser.close()
+        for _, article in parser.read_events():
+            if "result" not in (article.get("class") or "").split():
+                continue
+            i += 1
+            if i > num_search_results:
+                return results
+
+            link_tag = article.find(".//h3//a")
+            if link_tag is None or link_tag.get("href") is None:
+                continue
+            title = "".join(text.strip() for text in link_tag.itertext())
+
+            snippet_tag = next(
+                (
+                    p
+                    for p in article.iter("p")
+                    if "content" in (p.get("class") or "").split()
+                ),
+                None,
+            )
+            snippet = (
+                "".join(text.strip() for text in snippet_tag.itertext())
+                if snippet_tag is not None
+                else "No description available"
+            )
+
+            results.append(
+                {
+                    "id": i,
+                    "title": title,
+                    "link": link_tag.get("href"),
+                    "search_description": snippet,
+                }
+            )
+            article.clear()
+    return results
+
+
+def _parse_search_html(html, num_search_results):
+    """
+    Parses the top results out of a SearXNG results page with BeautifulSoup's pure-Python parser
+
+    Args:
+        html (str): The SearXNG results page HTML
+        num_search_results (int): The number of results to parse
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    soup = BeautifulSoup(html, "html.parser")
     results = []
 
     # BS4 scraping scripted for SearXNG in December 2025
@@ -60,17 +702,33 @@ def searxng_search(query, agent_config):
         results.append(
             {"id": i, "title": title, "link": link, "search_description": snippet}
         )
+    return results
 
-    # Call scrape_webpage to get `num_sites_scraped` page results, trying up to `max_scrape_tries` differnet pages.
+
+def _scrape_sequential(candidates, num_sites_scraped, agent_config, deduper=None):
+    """
+    Scrapes candidate pages one at a time, in rank order, until enough pages succeed
+
+    Args:
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        num_sites_scraped (int): The number of successfully scraped pages to stop at
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deduper (PageDeduper, default=None): Skips pages that are near-copies of pages already kept (not counted towards `num_sites_scraped`)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}
+    """
     web_contexts = []
-    for i in range(max_scrape_tries):
-        site_url = results[i]["link"]
+    for result in candidates:
+        site_url = result["link"]
         try:
             site_context = _scrape_webpage(site_url, agent_config)
-            if site_context is not None:
+            if site_context is not None and not _is_duplicate(
+                deduper, site_url, site_context
+            ):
                 web_contexts.append(
                     {
-                        "name": results[i]["title"],
+                        "name": result["title"],
                         "url": site_url,
                         "context": site_context,
                     }
@@ -79,43 +737,875 @@ def searxng_search(query, agent_config):
                     break
         except Exception:
             continue
-    if len(web_contexts) == 0:
-        # No sites were successfully scraped
-        return None
     return web_contexts
 
 
-def _scrape_webpage(url, agent_config):
+def _scrape_concurrent(
+    candidates, num_sites_scraped, agent_config, deduper=None, deadline=None
+):
     """
-    Get the plaintext contents of a webpage using trafilatura
+    Scrapes all candidate pages at once and keeps the first `num_sites_scraped` pages to finish
+
+    Pages that are still downloading once enough pages have succeeded are cancelled if they have not
+    started yet, or abandoned (left to finish in the background and ignored) if they have.
 
     Args:
-        url (str): The url to be scraped
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        num_sites_scraped (int): The number of successfully scraped pages to stop at
         agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deduper (PageDeduper, default=None): Skips pages that are near-copies of pages already kept (not counted towards `num_sites_scraped`)
+        deadline (float, default=None): `time.monotonic()` time to stop waiting on pages at (None for no deadline)
 
     Returns:
-        contents (str): The plain text contents of the scraped website
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}, in search rank order
     """
-    trafilatura_config = deepcopy(TRF_CONFIG)
-    trafilatura_config["DEFAULT"]["DOWNLOAD_TIMEOUT"] = agent_config["workers"][
-        "scrape_webpage"
-    ]["trafilatura_download_timeout"]
-    trafilatura_config["DEFAULT"]["EXTRACTION_TIMEOUT"] = agent_config["workers"][
-        "scrape_webpage"
-    ]["trafilatura_extraction_timeout"]
+    if len(candidates) == 0:
+        return []
 
+    scrape_concurrency = agent_config["workers"]["searxng_search"].get(
+        "scrape_concurrency", len(candidates)
+    )
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(scrape_concurrency, len(candidates)))
+    )
+    # Each page runs in a copy of the caller's context so its spans land in the caller's trace
+    futures = {
+        executor.submit(
+            contextvars.copy_context().run,
+            _scrape_webpage,
+            result["link"],
+            agent_config,
+        ): rank
+        for rank, result in enumerate(candidates)
+    }
+
+    scraped = {}
     try:
-        downloaded = fetch_url(url=url, config=trafilatura_config)
-        contents = extract(
-            downloaded,
-            include_formatting=True,
-            include_links=True,
-            config=trafilatura_config,
-        )
-        logging.debug("[+] WebSearchAgent.scrape_webpage: returning webpage text")
-        return contents
-    except Exception:
-        logging.debug(
+        for future in as_completed(futures, timeout=_time_left(deadline)):
+            try:
+                site_context = future.result()
+            except Exception:
+                continue
+            if site_context is None or _is_duplicate(
+                deduper, candidates[futures[future]]["link"], site_context
+            ):
+                continue
+            scraped[futures[future]] = site_context
+            if len(scraped) >= num_sites_scraped:
+                break
+    except FutureTimeoutError:
+        pass
+    finally:
+        # Do not wait on the slow pages, they are abandoned
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.debug(
+        f"[*] WebSearchAgent.searxng_search: Concurrent scrape finished with {len(scraped)}/{len(candidates)} pages"
+    )
+    return _ranked_contexts(candidates, scraped)
+
+
+def _scrape_hedged(
+    candidates,
+    num_sites_scraped,
+    agent_config,
+    deduper=None,
+    deadline=None,
+    parallel=1,
+    hedge_delay=None,
+):
+    """
+    Scrapes candidate pages in rank order, a few at a time, hedging slow downloads with the next candidates
+
+    Up to `parallel` pages (never more than are still needed) download at once, and a failed page is replaced by the
+    next candidate. When no page finishes for `hedge_delay` seconds, the next candidate also starts (a hedged request),
+    and whichever pages finish first are kept. Pages still downloading at the end are abandoned.
+
+    Args:
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        num_sites_scraped (int): The number of successfully scraped pages to stop at
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deduper (PageDeduper, default=None): Skips pages that are near-copies of pages already kept (not counted towards `num_sites_scraped`)
+        deadline (float, default=None): `time.monotonic()` time to stop waiting on pages at (None for no deadline)
+        parallel (int, default=1): Pages downloaded at once before hedging
+        hedge_delay (float, default=None): Seconds without a finished page before hedging (None to never hedge)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}, in search rank order
+    """
+    if len(candidates) == 0:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    pending = {}  # future -> rank
+    scraped = {}
+    next_rank = 0
+
+    def launch():
+        nonlocal next_rank
+        # Each page runs in a copy of the caller's context so its spans land in the caller's trace
+        future = executor.submit(
+            contextvars.copy_context().run,
+            _scrape_webpage,
+            candidates[next_rank]["link"],
+            agent_config,
+        )
+        pending[future] = next_rank
+        next_rank += 1
+
+    try:
+        while len(scraped) < num_sites_scraped:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            # Replace failed pages with the next candidates
+            needed = min(parallel, num_sites_scraped - len(scraped))
+            while next_rank < len(candidates) and len(pending) < needed:
+                launch()
+            if len(pending) == 0:
+                break
+
+            timeout = _time_left(deadline)
+            if hedge_delay is not None and next_rank < len(candidates):
+                timeout = hedge_delay if timeout is None else min(timeout, hedge_delay)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if len(done) == 0:
+                if hedge_delay is not None and next_rank < len(candidates):
+                    logging.debug(
+                        f"[*] WebSearchAgent.searxng_search: No page finished in {hedge_delay}s, hedging with {candidates[next_rank]['link']}"
+                    )
+                    launch()
+                continue
+
+            for future in done:
+                rank = pending.pop(future)
+                try:
+                    site_context = future.result()
+                except Exception:
+                    continue
+                if site_context is None or _is_duplicate(
+                    deduper, candidates[rank]["link"], site_context
+                ):
+                    continue
+                scraped[rank] = site_context
+                if len(scraped) >= num_sites_scraped:
+                    break
+    finally:
+        # Do not wait on the slow pages, they are abandoned
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return _ranked_contexts(candidates, scraped)
+
+
+def _ranked_contexts(candidates, scraped):
+    """
+    Builds the web contexts of the scraped pages in search rank order, not the order they finished in
+
+    Args:
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        scraped (dict): The extracted text of each successfully scraped page, keyed by its index in `candidates`
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}
+    """
+    return [
+        {
+            "name": candidates[rank]["title"],
+            "url": candidates[rank]["link"],
+            "context": scraped[rank],
+        }
+        for rank in sorted(scraped)
+    ]
+
+
+def _finish_search(web_contexts, candidates, deduper, deadline, agent_config):
+    """
+    Logs a finished search's statistics and applies the deadline fallback
+
+    Args:
+        web_contexts (list): The scraped pages
+        candidates (list): The search results that were scraped
+        deduper (PageDeduper): The search's deduper (None when near-duplicate detection is disabled)
+        deadline (float): `time.monotonic()` time the search must finish by (None for no deadline)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        web_contexts (list): The scraped pages or snippet contexts, None if there are none
+    """
+    _log_duplicates(deduper)
+    web_contexts = _apply_deadline(web_contexts, candidates, deadline)
+    page_cache = get_page_cache(agent_config)
+    if page_cache is not None:
+        logging.info(
+            f"[*] WebSearchAgent.searxng_search: Page cache stats - {page_cache.report()}"
+        )
+    if len(web_contexts) == 0:
+        # No sites were successfully scraped
+        return None
+    return web_contexts
+
+
+def _is_duplicate(deduper, url, site_context):
+    """
+    Checks a scraped page against the pages already kept for this search
+
+    Args:
+        deduper (PageDeduper): The search's deduper (None when near-duplicate detection is disabled)
+        url (str): The page URL
+        site_context (str): The extracted page text
+
+    Returns:
+        duplicate (bool): True if the page should be skipped
+    """
+    if deduper is None:
+        return False
+    with span("dedupe", url=url) as record:
+        duplicate = deduper.is_duplicate(url, site_context)
+        record["duplicate"] = duplicate
+    return duplicate
+
+
+def _log_duplicates(deduper):
+    """
+    Logs how many near-duplicate pages a search skipped, if any
+
+    Args:
+        deduper (PageDeduper): The search's deduper (None when near-duplicate detection is disabled)
+    """
+    if deduper is None or len(deduper.skipped) == 0:
+        return
+    logging.info(
+        f"[*] WebSearchAgent.searxng_search: Skipped {len(deduper.skipped)} near-duplicate pages"
+    )
+
+
+def _scrape_webpage(url, agent_config):
+    """
+    Get the plaintext contents of a webpage using trafilatura
+
+    Args:
+        url (str): The url to be scraped
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        contents (str): The plain text contents of the scraped website
+    """
+    trafilatura_config = _trafilatura_config(agent_config)
+    return _run_steps(
+        _scrape_steps(url, agent_config, trafilatura_config),
+        agent_config,
+        trafilatura_config,
+    )
+
+
+def _scrape_steps(url, agent_config, trafilatura_config):
+    """
+    Steps of `_scrape_webpage`, yielding its page cache and domain health calls, downloads and extraction (see `_run_steps`)
+
+    Pages missing from the page cache are downloaded and extracted. Expired entries are revalidated with a conditional
+    request, and a 304 response returns the cached text without downloading or extracting the page again.
+
+    Args:
+        url (str): The url to be scraped
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        contents (str): The plain text contents of the scraped website (None on failure)
+    """
+    started = time.monotonic()
+    domain_health = None
+    try:
+        # The page cache and domain health stores are SQLite-backed, every call into them is a blocking "call" step
+        page_cache, domain_health = yield (
+            "call",
+            functools.partial(_page_stores, agent_config),
+        )
+        entry = None
+        if page_cache is not None:
+            entry = yield ("call", functools.partial(page_cache.lookup, url))
+        if entry is not None and entry["fresh"]:
+            # Cache hits say nothing about the domain, they are not recorded
+            logging.debug("[+] WebSearchAgent.scrape_webpage: page cache hit")
+            return entry["content"]
+
+        response = None
+        if entry is not None:
+            # Same User-Agent as a fresh fetch, some sites answer the requests default with an error page
+            conditional_headers = {"User-Agent": TRF_HEADERS["User-Agent"]}
+            if entry["etag"]:
+                conditional_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                conditional_headers["If-Modified-Since"] = entry["last_modified"]
+            with span("fetch", url=url, revalidation=True):
+                response = yield ("fetch", url, conditional_headers)
+            if response and response.status == 304:
+                logging.debug(
+                    "[+] WebSearchAgent.scrape_webpage: page cache revalidated"
+                )
+                yield ("call", functools.partial(page_cache.refresh, url))
+                yield (
+                    "call",
+                    functools.partial(
+                        _record_health, domain_health, url, started, entry["content"]
+                    ),
+                )
+                return entry["content"]
+            if not response or response.status != 200:
+                # Servers that mishandle conditional requests get a plain fetch instead
+                logging.debug(
+                    f"[-] WebSearchAgent.scrape_webpage: page cache revalidation returned {response.status if response else None}, fetching again"
+                )
+                response = None
+
+        if response is None:
+            with span("fetch", url=url):
+                response = yield ("fetch", url, None)
+        contents = None
+        if _is_suitable_response(url, response, trafilatura_config):
+            with span("extract", url=url):
+                contents = yield ("extract", response.data)
+        if page_cache is not None and contents is not None:
+            yield (
+                "call",
+                functools.partial(
+                    page_cache.store,
+                    url,
+                    contents,
+                    etag=response.headers.get("etag"),
+                    last_modified=response.headers.get("last-modified"),
+                    raw_bytes=len(response.data),
+                ),
+            )
+        yield (
+            "call",
+            functools.partial(_record_health, domain_health, url, started, contents),
+        )
+        logging.debug("[+] WebSearchAgent.scrape_webpage: returning webpage text")
+        return contents
+    except Exception:
+        yield (
+            "call",
+            functools.partial(_record_health, domain_health, url, started, None),
+        )
+        logging.debug(
             "[-] WebSearchAgent.scrape_webpage: failed to scrape webpage text"
         )
         return None
+
+
+def _trafilatura_config(agent_config):
+    """
+    Builds a trafilatura config with the agent's download and extraction timeouts
+
+    Args:
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        trafilatura_config (ConfigParser): The trafilatura config
+    """
+    trafilatura_config = deepcopy(TRF_CONFIG)
+    trafilatura_config["DEFAULT"]["DOWNLOAD_TIMEOUT"] = agent_config["workers"][
+        "scrape_webpage"
+    ]["trafilatura_download_timeout"]
+    trafilatura_config["DEFAULT"]["EXTRACTION_TIMEOUT"] = agent_config["workers"][
+        "scrape_webpage"
+    ]["trafilatura_extraction_timeout"]
+    return trafilatura_config
+
+
+def _run_steps(steps, agent_config, trafilatura_config=None):
+    """
+    Runs a search or page scrape's steps, carrying out every step it yields in the calling thread
+
+    Searches and page scrapes are written once as generators that yield the I/O they need ("search", "fetch",
+    "extract" or a blocking "call") and receive its result, so caching, domain health and fallbacks are shared by the
+    sync and async versions. An exception raised by a step is thrown back into the generator.
+
+    Args:
+        steps (generator): The steps, e.g. `_scrape_steps(...)`
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser, default=None): The trafilatura config with the agent's timeouts, for page steps
+
+    Returns:
+        value: The steps' return value
+    """
+    value, error = None, None
+    try:
+        while True:
+            step = steps.send(value) if error is None else steps.throw(error)
+            value, error = None, None
+            try:
+                value = _run_step(step, agent_config, trafilatura_config)
+            except Exception as e:
+                error = e
+    except StopIteration as stop:
+        return stop.value
+
+
+async def _async_run_steps(steps, agent_config, trafilatura_config=None):
+    """
+    Async counterpart of `_run_steps`, awaiting downloads on the event loop and running blocking steps in the loop's
+    default executor
+
+    Args:
+        steps (generator): The steps, e.g. `_scrape_steps(...)`
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser, default=None): The trafilatura config with the agent's timeouts, for page steps
+
+    Returns:
+        value: The steps' return value
+    """
+    value, error = None, None
+    try:
+        while True:
+            step = steps.send(value) if error is None else steps.throw(error)
+            value, error = None, None
+            try:
+                value = await _async_run_step(step, agent_config, trafilatura_config)
+            except Exception as e:
+                error = e
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        # A cancelled task leaves the steps suspended, close them so their spans end
+        steps.close()
+
+
+def _run_step(step, agent_config, trafilatura_config):
+    """
+    Carries out one step yielded to `_run_steps`
+
+    Args:
+        step (tuple): ("call", func), ("search", url, headers, pool_config, timeout), ("fetch", url, headers) or ("extract", html)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        value: The step's result (see `_scrape_steps` and `_search_steps`)
+    """
+    kind = step[0]
+    if kind == "call":
+        return step[1]()
+    if kind == "search":
+        _, url, headers, pool_config, timeout = step
+        session = get_http_session("searxng", pool_config)
+        response = session.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.status_code, response.text
+    if kind == "fetch":
+        _, url, headers = step
+        if headers is None:
+            return fetch_response(url, with_headers=True, config=trafilatura_config)
+        session = get_http_session("pages")
+        with session.get(
+            url,
+            headers=headers,
+            timeout=float(trafilatura_config["DEFAULT"]["DOWNLOAD_TIMEOUT"]),
+            stream=True,
+        ) as response:
+            data = bytearray()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+                _append_chunk(data, chunk, trafilatura_config)
+        return _page_response(
+            bytes(data), response.status_code, response.url, response.headers
+        )
+    if kind == "extract":
+        return _extract_html(step[1], trafilatura_config, agent_config)
+    raise ValueError(f"Unknown step: {kind}")
+
+
+async def _async_run_step(step, agent_config, trafilatura_config):
+    """
+    Async counterpart of `_run_step`
+
+    Args:
+        step (tuple): ("call", func), ("search", url, headers, pool_config, timeout), ("fetch", url, headers) or ("extract", html)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        value: The step's result (see `_scrape_steps` and `_search_steps`)
+    """
+    kind = step[0]
+    loop = asyncio.get_running_loop()
+    if kind == "call":
+        return await loop.run_in_executor(None, step[1])
+    if kind == "search":
+        _, url, headers, pool_config, timeout = step
+        client = get_async_http_client("searxng", pool_config)
+        response = await client.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.status_code, response.text
+    if kind == "fetch":
+        _, url, headers = step
+        client = get_async_http_client("pages")
+        async with client.stream(
+            "GET",
+            url,
+            headers=headers or {"User-Agent": TRF_HEADERS["User-Agent"]},
+            timeout=float(trafilatura_config["DEFAULT"]["DOWNLOAD_TIMEOUT"]),
+        ) as response:
+            data = bytearray()
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                _append_chunk(data, chunk, trafilatura_config)
+        return _page_response(
+            bytes(data), response.status_code, str(response.url), response.headers
+        )
+    if kind == "extract":
+        extraction_pool = get_extraction_pool(agent_config)
+        if extraction_pool is None:
+            return await loop.run_in_executor(
+                None, _extract_page, step[1], trafilatura_config
+            )
+        return await extraction_pool.async_extract(step[1])
+    raise ValueError(f"Unknown step: {kind}")
+
+
+def _is_suitable_response(url, response, trafilatura_config):
+    """
+    Applies the checks trafilatura's `fetch_url` runs on a download before it is extracted
+
+    Args:
+        url (str): The page URL
+        response (Response): The downloaded page (None if the download failed)
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        suitable (bool): True for a 200 response between MIN_FILE_SIZE and MAX_FILE_SIZE bytes
+    """
+    if not response or response.status != 200:
+        return False
+    return is_acceptable_length(
+        len(response.data), Extractor(config=trafilatura_config, url=url)
+    )
+
+
+def _append_chunk(data, chunk, trafilatura_config):
+    """
+    Mutator function to add a downloaded chunk to a page body, stopping the download past MAX_FILE_SIZE
+
+    Mirrors trafilatura's own downloads, which stop reading as soon as a page is too large to extract.
+
+    Args:
+        data (bytearray): The page body read so far
+        chunk (bytes): The next chunk of the body
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+    """
+    data.extend(chunk)
+    if len(data) > trafilatura_config.getint("DEFAULT", "MAX_FILE_SIZE"):
+        raise ValueError("MAX_FILE_SIZE exceeded")
+
+
+def _page_response(data, status, url, headers):
+    """
+    Wraps a downloaded page like trafilatura's `fetch_response` does
+
+    Args:
+        data (bytes): The response body
+        status (int): The HTTP status code
+        url (str): The final URL, after redirects
+        headers (Mapping): The response headers
+
+    Returns:
+        response (Response): The trafilatura response, with lowercased headers
+    """
+    response = Response(data, status, url)
+    response.store_headers(headers)
+    return response
+
+
+def _extract_html(html, trafilatura_config, agent_config):
+    """
+    Extracts the plaintext contents of downloaded HTML, in the extraction pool's worker processes when it is enabled
+
+    Args:
+        html (bytes): The raw page HTML
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+
+    Returns:
+        contents (str): The plain text contents of the page
+    """
+    extraction_pool = get_extraction_pool(agent_config)
+    if extraction_pool is None:
+        return _extract_page(html, trafilatura_config)
+    return extraction_pool.extract(html)
+
+
+def _extract_page(html, trafilatura_config):
+    """
+    Extracts the plaintext contents of downloaded HTML with trafilatura
+
+    Args:
+        html (str|bytes): The downloaded page HTML
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        contents (str): The plain text contents of the page
+    """
+    return extract(
+        html,
+        include_formatting=True,
+        include_links=True,
+        config=trafilatura_config,
+    )
+
+
+async def async_searxng_search(query, agent_config, results=None, deadline=None):
+    """
+    Async counterpart of `searxng_search`
+
+    The SearXNG request and page downloads run on the event loop, while result parsing and trafilatura extraction run
+    in the loop's default executor so they do not block other conversations.
+
+    Args:
+        query (str|list): The search query to be run, or alternative queries to run at once (see `_fanout_results`)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        results (list, default=None): Already fetched search results (e.g. from `async_search_snippets`) to scrape instead of running the query again
+        deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}
+    """
+
+    num_sites_scraped = agent_config["workers"]["searxng_search"]["num_sites_scraped"]
+    max_scrape_tries = agent_config["workers"]["searxng_search"]["max_scrape_tries"]
+
+    if results is None:
+        results = await _async_fanout_results(query, agent_config, deadline)
+
+    # The domain health store is SQLite-backed, keep it off the event loop
+    loop = asyncio.get_running_loop()
+    candidates = await loop.run_in_executor(
+        None, _order_candidates, results, agent_config
+    )
+    candidates = candidates[:max_scrape_tries]
+    deduper = get_deduper(agent_config)
+    web_contexts = await _async_scrape(
+        candidates, num_sites_scraped, agent_config, deduper, deadline
+    )
+    return _finish_search(web_contexts, candidates, deduper, deadline, agent_config)
+
+
+async def async_search_snippets(query, agent_config, deadline=None):
+    """
+    Async counterpart of `search_snippets`
+
+    Args:
+        query (str|list): The search query to be run, or alternative queries to run at once (see `_fanout_results`)
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by (None for no deadline)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{snippet}"}
+        results (list): The parsed search results, so the caller can escalate to `async_searxng_search` without searching again
+    """
+    results = await _async_fanout_results(query, agent_config, deadline)
+    return _snippet_contexts(results), results
+
+
+async def _async_fanout_results(query, agent_config, deadline=None):
+    """
+    Async counterpart of `_fanout_results`
+
+    Args:
+        query (str|list): The search query to be run, or a list of alternative queries
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by, caps the request timeouts
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    if isinstance(query, str):
+        return await _async_search_results(query, agent_config, deadline)
+    if len(query) == 1:
+        return await _async_search_results(query[0], agent_config, deadline)
+
+    result_lists = await asyncio.gather(
+        *(
+            _async_search_results(search_query, agent_config, deadline)
+            for search_query in query
+        ),
+        return_exceptions=True,
+    )
+    return _fuse_results(query, result_lists, agent_config)
+
+
+async def _async_search_results(query, agent_config, deadline=None):
+    """
+    Async counterpart of `_search_results`
+
+    Args:
+        query (str): The search query to be run
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deadline (float, default=None): `time.monotonic()` time the search must finish by, caps the request timeout
+
+    Returns:
+        results (list): A list of dictionary objects of format {"id": {rank}, "title": "{title}", "link": "{url}", "search_description": "{snippet}"}
+    """
+    return await _async_run_steps(
+        _search_steps(query, agent_config, deadline), agent_config
+    )
+
+
+async def _async_scrape(
+    candidates, num_sites_scraped, agent_config, deduper=None, deadline=None
+):
+    """
+    Scrapes candidate pages as event loop tasks and keeps the first `num_sites_scraped` pages to finish
+
+    In "sequential" scrape mode, one page is downloaded at a time in rank order, and "hedged" mode runs
+    `_async_scrape_hedged`. Tasks still running once enough pages have succeeded, or at the deadline, are cancelled.
+
+    Args:
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        num_sites_scraped (int): The number of successfully scraped pages to stop at
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deduper (PageDeduper, default=None): Skips pages that are near-copies of pages already kept (not counted towards `num_sites_scraped`)
+        deadline (float, default=None): `time.monotonic()` time to stop waiting on pages at (None for no deadline)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}, in search rank order
+    """
+    if len(candidates) == 0:
+        return []
+
+    scrape_mode = agent_config["workers"]["searxng_search"].get(
+        "scrape_mode", "sequential"
+    )
+    if scrape_mode == "hedged":
+        return await _async_scrape_hedged(
+            candidates,
+            num_sites_scraped,
+            agent_config,
+            deduper,
+            deadline,
+            agent_config["workers"]["searxng_search"].get("hedge_delay"),
+        )
+    scrape_concurrency = 1
+    if scrape_mode == "concurrent":
+        scrape_concurrency = agent_config["workers"]["searxng_search"].get(
+            "scrape_concurrency", len(candidates)
+        )
+    semaphore = asyncio.Semaphore(max(1, scrape_concurrency))
+    trafilatura_config = _trafilatura_config(agent_config)
+
+    async def scrape(rank):
+        async with semaphore:
+            site_context = await _async_scrape_webpage(
+                candidates[rank]["link"], agent_config, trafilatura_config
+            )
+            return rank, site_context
+
+    tasks = [asyncio.create_task(scrape(rank)) for rank in range(len(candidates))]
+    scraped = {}
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=_time_left(deadline)):
+            rank, site_context = await next_done
+            if site_context is None or _is_duplicate(
+                deduper, candidates[rank]["link"], site_context
+            ):
+                continue
+            scraped[rank] = site_context
+            if len(scraped) >= num_sites_scraped:
+                break
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return _ranked_contexts(candidates, scraped)
+
+
+async def _async_scrape_hedged(
+    candidates, num_sites_scraped, agent_config, deduper, deadline, hedge_delay
+):
+    """
+    Async counterpart of `_scrape_hedged`, with one page downloading per page still needed
+
+    Args:
+        candidates (list): Parsed search results of format {"id": {rank}, "title": "{title}", "link": "{url}", ...}
+        num_sites_scraped (int): The number of successfully scraped pages to stop at
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        deduper (PageDeduper): Skips pages that are near-copies of pages already kept (None when disabled)
+        deadline (float): `time.monotonic()` time to stop waiting on pages at (None for no deadline)
+        hedge_delay (float): Seconds without a finished page before hedging (None to never hedge)
+
+    Returns:
+        web_contexts (list): A list of dictionary objects of format {"name": "{name}", "url": "{url}", "context": "{page content}"}, in search rank order
+    """
+    trafilatura_config = _trafilatura_config(agent_config)
+    pending = {}  # task -> rank
+    scraped = {}
+    next_rank = 0
+
+    def launch():
+        nonlocal next_rank
+        task = asyncio.create_task(
+            _async_scrape_webpage(
+                candidates[next_rank]["link"], agent_config, trafilatura_config
+            )
+        )
+        pending[task] = next_rank
+        next_rank += 1
+
+    try:
+        while len(scraped) < num_sites_scraped:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            # Replace failed pages with the next candidates
+            needed = num_sites_scraped - len(scraped)
+            while next_rank < len(candidates) and len(pending) < needed:
+                launch()
+            if len(pending) == 0:
+                break
+
+            timeout = _time_left(deadline)
+            if hedge_delay is not None and next_rank < len(candidates):
+                timeout = hedge_delay if timeout is None else min(timeout, hedge_delay)
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if len(done) == 0:
+                if hedge_delay is not None and next_rank < len(candidates):
+                    logging.debug(
+                        f"[*] WebSearchAgent.searxng_search: No page finished in {hedge_delay}s, hedging with {candidates[next_rank]['link']}"
+                    )
+                    launch()
+                continue
+
+            for task in done:
+                rank = pending.pop(task)
+                site_context = task.result()
+                if site_context is None or _is_duplicate(
+                    deduper, candidates[rank]["link"], site_context
+                ):
+                    continue
+                scraped[rank] = site_context
+                if len(scraped) >= num_sites_scraped:
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return _ranked_contexts(candidates, scraped)
+
+
+async def _async_scrape_webpage(url, agent_config, trafilatura_config):
+    """
+    Async counterpart of `_scrape_webpage`, including page cache lookups and revalidation
+
+    Args:
+        url (str): The url to be scraped
+        agent_config (dict): The agent class instance's configuration values, including parameters for workers
+        trafilatura_config (ConfigParser): The trafilatura config with the agent's timeouts
+
+    Returns:
+        contents (str): The plain text contents of the scraped website
+    """
+    return await _async_run_steps(
+        _scrape_steps(url, agent_config, trafilatura_config),
+        agent_config,
+        trafilatura_config,
+    )
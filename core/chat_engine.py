@@ -1,10 +1,19 @@
 import logging
+import time
 from pathlib import Path
 
-import ollama
 import yaml
 
 from agents.websearch.agent import WebSearchAgent
+from core.clients import get_async_ollama_client, get_ollama_client, get_pool_stats
+from core.history import compact_history, stable_history
+from core.tracing import (
+    configure_tracing,
+    finish_turn,
+    record_ollama,
+    span,
+    start_turn,
+)
 
 
 class ChatEngine:
@@ -14,6 +23,7 @@ class ChatEngine:
     Methods:
         __init__: loads the configuration YAML file to set preferences for the LM conversation
         process_message: passes user input through loaded agent(s) and modifies user prompt
+        async_process_message: async counterpart of process_message for serving many conversations on one event loop
         _generate_response: receives input from process_message, generates response from engine's LM, and returns it
     """
 
@@ -35,16 +45,33 @@ class ChatEngine:
         self.host = self.chat_config["chat_engine"]["host"]
         self.model = self.chat_config["chat_engine"]["model"]
         self.system_message = self.chat_config["chat_engine"]["system_message"]
+        self.pool_config = self.chat_config["chat_engine"].get("connection_pool")
+        self.history_config = self.chat_config["chat_engine"].get("history")
+        self.options = self.chat_config["chat_engine"].get("options")
+        self.keep_alive = self.chat_config["chat_engine"].get("keep_alive")
+        self.tracing_config = self.chat_config.get("tracing", {})
+        configure_tracing(self.tracing_config)
 
         self.agents = []
         if agents is not None:
             self.agents = agents
 
         self.conversation = [self.system_message]
+        # Bare prompts and source URLs of user turns modified by agents, keyed by conversation index
+        self.turn_sources = {}
+        # "stable" history layout: conversation index of the oldest turn still sent, and the last messages sent
+        self.history_start = 1
+        self.last_messages = []
+        self.last_prompt_eval_count = (
+            None  # Prompt tokens ollama evaluated (not reused from its cache) last turn
+        )
 
         # Coded for WebSearch agent
         self.last_search_used = False
         self.last_search_urls = []
+        self.trace = (
+            None  # Trace of the turn being processed (None when tracing is disabled)
+        )
 
     def process_message(self, user_prompt):
         """
@@ -56,23 +83,132 @@ class ChatEngine:
         Returns:
             _generate_response (func): The user input is passed to the LM and returns a generator of chunks
         """
-        query = {"role": "user", "content": user_prompt}
-
         # Coded for WebSearch agent, if defaults then agent was not used
         self.last_search_used = False
         self.last_search_urls = []
 
-        for agent in self.agents:
-            if isinstance(agent, WebSearchAgent):
-                result, revised_query, urls = agent.search(user_prompt)
-                if result:
-                    query["content"] = revised_query
-                    self.last_search_used = True  # Set flag when search is used
-                    self.last_search_urls = urls  # Store the source URL
+        self.trace = start_turn()
+        agent_results = []
+        try:
+            for agent in self.agents:
+                if isinstance(agent, WebSearchAgent):
+                    with span("websearch"):
+                        agent_results.append(agent.search(user_prompt))
+        except BaseException:
+            self._end_turn()
+            raise
+
+        self._add_user_turn(user_prompt, agent_results)
+        return self._generate_response()
+
+    async def async_process_message(self, user_prompt):
+        """
+        Async counterpart of `process_message`, running agents and the LM call on the running event loop
+
+        Args:
+            user_prompt (str): The user input to the LM
+
+        Returns:
+            _async_generate_response (func): An async generator of chunks with the LM's response
+        """
+        self.last_search_used = False
+        self.last_search_urls = []
+
+        self.trace = start_turn()
+        agent_results = []
+        try:
+            for agent in self.agents:
+                if isinstance(agent, WebSearchAgent):
+                    with span("websearch"):
+                        agent_results.append(await agent.async_search(user_prompt))
+        except BaseException:
+            self._end_turn()
+            raise
+
+        self._add_user_turn(user_prompt, agent_results)
+        return self._async_generate_response()
+
+    def _add_user_turn(self, user_prompt, agent_results):
+        """
+        Mutator function to add the user turn, modified by the agent results, to the conversation
+
+        Args:
+            user_prompt (str): The user input to the LM
+            agent_results (list): The (result, revised_query, urls) tuples returned by each agent
+        """
+        query = {"role": "user", "content": user_prompt}
+        for result, revised_query, urls in agent_results:
+            if result:
+                query["content"] = revised_query
+                self.last_search_used = True  # Set flag when search is used
+                self.last_search_urls = urls  # Store the source URL
 
         logging.info(f"[*] ChatEngine: Query is - {query}")
+        if self.last_search_used:
+            self.turn_sources[len(self.conversation)] = {
+                "prompt": user_prompt,
+                "urls": self.last_search_urls,
+            }
         self.conversation.append(query)
-        return self._generate_response()
+
+    def _discard_user_turn(self):
+        """
+        Mutator function to remove the current user turn when its response did not finish (client disconnected or
+        ollama failed), so the next turn does not run on a history with an unanswered prompt
+        """
+        if len(self.conversation) > 0 and self.conversation[-1]["role"] == "user":
+            self.turn_sources.pop(len(self.conversation) - 1, None)
+            self.conversation.pop()
+            logging.info("[*] ChatEngine: Discarded the unanswered user turn")
+
+    def _build_messages(self):
+        """
+        Mutator function to build the messages sent to the LM for the current turn
+
+        With the "stable" history layout, earlier turns keep the same bytes from request to request so ollama can
+        reuse its cached prompt prefix, and the turn's web context is only in the last message.
+
+        Returns:
+            messages (list): The messages to send to the LM
+        """
+        if self.history_config and self.history_config.get("layout") == "stable":
+            messages, self.history_start = stable_history(
+                self.conversation,
+                self.turn_sources,
+                self.history_config,
+                self.history_start,
+            )
+            return messages
+        return compact_history(
+            self.conversation, self.turn_sources, self.history_config
+        )
+
+    def _report_prompt_eval(self, messages, final_chunk, response):
+        """
+        Mutator function to log how many prompt tokens ollama evaluated this turn, next to how much of the prompt was
+        unchanged since the previous turn (only the tokens after the first changed message should be evaluated)
+
+        Args:
+            messages (list): The messages sent this turn
+            final_chunk (dict): The last response chunk, carrying ollama's token counts (None if the stream was empty)
+            response (str): The complete response, cached by ollama after the prompt
+        """
+        self.last_prompt_eval_count = None
+        if final_chunk is not None:
+            self.last_prompt_eval_count = final_chunk.get("prompt_eval_count")
+        unchanged = 0
+        for message, previous_message in zip(messages, self.last_messages):
+            if message != previous_message:
+                break
+            unchanged += 1
+        unchanged_chars = sum(
+            len(message["content"]) for message in messages[:unchanged]
+        )
+        new_chars = sum(len(message["content"]) for message in messages[unchanged:])
+        logging.info(
+            f"[*] ChatEngine: Evaluated {self.last_prompt_eval_count} prompt tokens, {unchanged}/{len(messages)} leading messages unchanged since last turn ({unchanged_chars} chars reusable, {new_chars} chars new)"
+        )
+        self.last_messages = messages + [{"role": "assistant", "content": response}]
 
     def _generate_response(self):
         """
@@ -81,15 +217,118 @@ class ChatEngine:
         Returns:
             content (generator): A generator of chunks from the LM with the resposne to the user input
         """
-        client = ollama.Client(self.host)
-        response_stream = client.chat(
-            model=self.model, messages=self.conversation, stream=True
-        )
-        complete_response = ""
+        client = get_ollama_client(self.host, self.pool_config)
+        messages = self._build_messages()
+        parts = []
+
+        # An unfinished reply (client gone, stream error) leaves no unanswered user turn behind
+        finished = False
+        response_stream = None
+        try:
+            with span("generate", model=self.model) as record:
+                started = time.perf_counter()
+                response_stream = client.chat(**self._chat_args(messages))
+                chunk = None
+                for chunk in response_stream:
+                    yield self._read_chunk(chunk, record, started, parts)
+                self._finish_response(messages, chunk, parts, record)
+            finished = True
+        finally:
+            if not finished:
+                # Closes the ollama HTTP stream now instead of when it is garbage collected
+                if hasattr(response_stream, "close"):
+                    response_stream.close()
+                self._discard_user_turn()
+            # Failed and aborted turns are traced too, they are often the slow ones
+            self._end_turn()
+
+    async def _async_generate_response(self):
+        """
+        Async counterpart of `_generate_response`
+
+        Returns:
+            content (async generator): An async generator of chunks from the LM with the response to the user input
+        """
+        client = get_async_ollama_client(self.host, self.pool_config)
+        messages = self._build_messages()
+        parts = []
+
+        # An unfinished reply (client gone, stream error) leaves no unanswered user turn behind
+        finished = False
+        response_stream = None
+        try:
+            with span("generate", model=self.model) as record:
+                started = time.perf_counter()
+                response_stream = await client.chat(**self._chat_args(messages))
+                chunk = None
+                async for chunk in response_stream:
+                    yield self._read_chunk(chunk, record, started, parts)
+                self._finish_response(messages, chunk, parts, record)
+            finished = True
+        finally:
+            if not finished:
+                # Closes the ollama HTTP stream now instead of when it is garbage collected
+                if hasattr(response_stream, "aclose"):
+                    await response_stream.aclose()
+                self._discard_user_turn()
+            # Failed and aborted turns are traced too, they are often the slow ones
+            self._end_turn()
+
+    def _chat_args(self, messages):
+        """
+        Accessor function for the arguments of the streamed ollama chat call
+
+        Args:
+            messages (list): The messages to send to the LM
 
-        for chunk in response_stream:
-            content = chunk["message"]["content"]
-            complete_response += content
-            yield content
+        Returns:
+            chat_args (dict): Keyword arguments for `client.chat`
+        """
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "options": self.options,
+            "keep_alive": self.keep_alive,
+        }
+
+    def _read_chunk(self, chunk, record, started, parts):
+        """
+        Reads one streamed response chunk, timing the first one
+
+        Args:
+            chunk (dict): The response chunk
+            record (dict): The "generate" span
+            started (float): `time.perf_counter()` time the request was sent at
+            parts (list): The response text so far, the chunk's text is appended to it
 
+        Returns:
+            content (str): The chunk's text
+        """
+        if "ttft_ms" not in record:
+            record["ttft_ms"] = round(1000 * (time.perf_counter() - started), 3)
+        content = chunk["message"]["content"]
+        parts.append(content)
+        return content
+
+    def _finish_response(self, messages, final_chunk, parts, record):
+        """
+        Mutator function to record a completed response and add it to the conversation
+
+        Args:
+            messages (list): The messages sent this turn
+            final_chunk (dict): The last response chunk (None if the stream was empty)
+            parts (list): The text of every response chunk
+            record (dict): The "generate" span
+        """
+        # The final chunk carries the token counts and timings of the whole response
+        if final_chunk is not None:
+            record_ollama(record, final_chunk)
+        complete_response = "".join(parts)
+        self._report_prompt_eval(messages, final_chunk, complete_response)
         self.conversation.append({"role": "assistant", "content": complete_response})
+
+    def _end_turn(self):
+        """Mutator function to log the connection pool stats and flush the turn's trace"""
+        logging.info(f"[*] ChatEngine: Connection pool stats - {get_pool_stats()}")
+        finish_turn(self.trace)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import threading
+
+import httpx
+import ollama
+import requests
+from requests.adapters import HTTPAdapter
+
+# Long-lived clients shared by the chat engine and every agent, keyed by host (Ollama) or name (HTTP)
+_ollama_clients = {}
+_http_sessions = {}
+# Async clients are bound to the event loop that created them, so they are keyed by (host or name, loop)
+_async_ollama_clients = {}
+_async_http_clients = {}
+_registry_lock = threading.Lock()
+
+# Registry hit/miss counters, a miss is a newly created client or session
+_pool_stats = {
+    "ollama": {"hits": 0, "misses": 0},
+    "http": {"hits": 0, "misses": 0},
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_OLLAMA_TIMEOUT = None  # ollama's default, model loads can be slow
+DEFAULT_HTTP_TIMEOUT = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60
+
+
+def get_ollama_client(host, pool_config=None):
+    """
+    Returns the shared ollama client for a host, creating it on first use
+
+    The client keeps its HTTP connections alive between calls, so repeated tool and chat calls to the
+    same host skip the TCP (and TLS) setup. The pool settings of the first caller for a host are used.
+
+    Args:
+        host (str): The ollama host URL
+        pool_config (dict, default=None): Optional "pool_size", "timeout" (seconds) and "keepalive_expiry" (seconds) settings
+
+    Returns:
+        client (ollama.Client): The pooled client for the host
+    """
+    pool_config = pool_config or {}
+    with _registry_lock:
+        client = _ollama_clients.get(host)
+        if client is not None:
+            _pool_stats["ollama"]["hits"] += 1
+            return client
+
+        _pool_stats["ollama"]["misses"] += 1
+        client = ollama.Client(
+            host,
+            timeout=pool_config.get("timeout", DEFAULT_OLLAMA_TIMEOUT),
+            limits=_httpx_limits(pool_config),
+        )
+        _ollama_clients[host] = client
+        logging.debug(f"[*] clients: Created pooled ollama client for {host}")
+        return client
+
+
+def get_async_ollama_client(host, pool_config=None):
+    """
+    Returns the shared async ollama client for a host on the running event loop, creating it on first use
+
+    Args:
+        host (str): The ollama host URL
+        pool_config (dict, default=None): Optional "pool_size", "timeout" (seconds) and "keepalive_expiry" (seconds) settings
+
+    Returns:
+        client (ollama.AsyncClient): The pooled async client for the host
+    """
+    pool_config = pool_config or {}
+    key = (host, asyncio.get_running_loop())
+    with _registry_lock:
+        client = _async_ollama_clients.get(key)
+        if client is not None:
+            _pool_stats["ollama"]["hits"] += 1
+            return client
+
+        _pool_stats["ollama"]["misses"] += 1
+        client = ollama.AsyncClient(
+            host,
+            timeout=pool_config.get("timeout", DEFAULT_OLLAMA_TIMEOUT),
+            limits=_httpx_limits(pool_config),
+        )
+        _async_ollama_clients[key] = client
+        logging.debug(f"[*] clients: Created pooled async ollama client for {host}")
+        return client
+
+
+def get_async_http_client(name, pool_config=None):
+    """
+    Returns a shared `httpx.AsyncClient` for a named use on the running event loop, creating it on first use
+
+    Args:
+        name (str): The name the client is registered under
+        pool_config (dict, default=None): Optional "pool_size" and "keepalive_expiry" (seconds) settings
+
+    Returns:
+        client (httpx.AsyncClient): The pooled async HTTP client
+    """
+    pool_config = pool_config or {}
+    key = (name, asyncio.get_running_loop())
+    with _registry_lock:
+        client = _async_http_clients.get(key)
+        if client is not None:
+            _pool_stats["http"]["hits"] += 1
+            return client
+
+        _pool_stats["http"]["misses"] += 1
+        client = httpx.AsyncClient(
+            follow_redirects=True, limits=_httpx_limits(pool_config)
+        )
+        _async_http_clients[key] = client
+        logging.debug(f'[*] clients: Created pooled async HTTP client "{name}"')
+        return client
+
+
+def _httpx_limits(pool_config):
+    """
+    Builds httpx connection pool limits from a pool config
+
+    Args:
+        pool_config (dict): Optional "pool_size" and "keepalive_expiry" (seconds) settings
+
+    Returns:
+        limits (httpx.Limits): The connection pool limits
+    """
+    pool_size = pool_config.get("pool_size", DEFAULT_POOL_SIZE)
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=pool_config.get("keepalive_expiry", DEFAULT_KEEPALIVE_EXPIRY),
+    )
+
+
+def get_http_session(name, pool_config=None):
+    """
+    Returns a shared `requests.Session` for a named use (e.g. "searxng"), creating it on first use
+
+    Args:
+        name (str): The name the session is registered under
+        pool_config (dict, default=None): Optional "pool_size" setting (connections kept alive per host)
+
+    Returns:
+        session (requests.Session): The pooled session
+    """
+    pool_config = pool_config or {}
+    with _registry_lock:
+        session = _http_sessions.get(name)
+        if session is not None:
+            _pool_stats["http"]["hits"] += 1
+            return session
+
+        _pool_stats["http"]["misses"] += 1
+        pool_size = pool_config.get("pool_size", DEFAULT_POOL_SIZE)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _http_sessions[name] = session
+        logging.debug(f'[*] clients: Created pooled HTTP session "{name}"')
+        return session
+
+
+def get_pool_stats():
+    """
+    Accessor function for the client registry hit/miss counters
+
+    Returns:
+        stats (dict): Counters of format {"ollama": {"hits": int, "misses": int}, "http": {"hits": int, "misses": int}}
+    """
+    with _registry_lock:
+        return {kind: dict(counts) for kind, counts in _pool_stats.items()}
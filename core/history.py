@@ -0,0 +1,158 @@
+import logging
+
+
+def compact_history(conversation, turn_sources, history_config):
+    """
+    Builds the messages sent to the LM from the full conversation, within a character budget
+
+    Earlier user turns that had web context injected by an agent are replaced by the bare user prompt and a short list
+    of sources. If the conversation is still over `max_chars`, the oldest turns are dropped (the system message and the
+    current turn are always kept), and optionally replaced by a one-line note listing the dropped prompts.
+
+    Args:
+        conversation (list): The full conversation, starting with the system message and ending with the current user turn
+        turn_sources (dict): Agent-modified user turns of format {conversation index: {"prompt": "{bare prompt}", "urls": [...]}}
+        history_config (dict): The "history" settings from chat_config.yaml (max_chars, strip_stale_context, summarize_dropped)
+
+    Returns:
+        messages (list): The messages to send to the LM
+    """
+    if not history_config:
+        return conversation
+
+    system_message = conversation[0]
+    current_turn = conversation[-1]
+    history = []  # (conversation index, message)
+    for i, message in enumerate(conversation[1:-1], start=1):
+        if history_config.get("strip_stale_context", True) and i in turn_sources:
+            message = _strip_context(message, turn_sources[i])
+        history.append((i, message))
+
+    max_chars = history_config.get("max_chars")
+    if max_chars is None:
+        return [system_message, *(message for _, message in history), current_turn]
+
+    # Drop the oldest user/assistant turns until the messages fit the budget
+    used_chars = len(system_message["content"]) + len(current_turn["content"])
+    used_chars += sum(len(message["content"]) for _, message in history)
+    dropped_prompts = []
+    while used_chars > max_chars and len(history) > 0:
+        i, message = history.pop(0)
+        used_chars -= len(message["content"])
+        if message["role"] == "user":
+            prompt = (
+                turn_sources[i]["prompt"] if i in turn_sources else message["content"]
+            )
+            dropped_prompts.append(prompt)
+        # Never start the kept history with an assistant reply
+        while len(history) > 0 and history[0][1]["role"] != "user":
+            used_chars -= len(history.pop(0)[1]["content"])
+
+    messages = [message for _, message in history]
+    if len(dropped_prompts) == 0:
+        return [system_message, *messages, current_turn]
+
+    logging.info(
+        f"[*] ChatEngine: Dropped {len(dropped_prompts)} oldest turns to fit history in {max_chars} characters"
+    )
+    if not history_config.get("summarize_dropped", True):
+        return [system_message, *messages, current_turn]
+    return [system_message, _summarize(dropped_prompts), *messages, current_turn]
+
+
+def stable_history(conversation, turn_sources, history_config, history_start):
+    """
+    Builds the messages sent to the LM so that everything before the current turn is byte-identical between requests
+
+    Ollama reuses the KV cache of the longest prompt prefix it has already evaluated, so a prompt only costs the tokens
+    after the first changed byte. Here earlier user turns are always sent without their injected web context, the
+    context only appears in the current (last) turn, and turns are dropped in large steps: once the messages are over
+    `max_chars`, the oldest turns are dropped until they fit in `compact_to` of the budget, and the same turns stay
+    dropped until the budget is exceeded again. Between those steps each request only adds the previous reply and
+    the new turn to the evaluated prompt.
+
+    Args:
+        conversation (list): The full conversation, starting with the system message and ending with the current user turn
+        turn_sources (dict): Agent-modified user turns of format {conversation index: {"prompt": "{bare prompt}", "urls": [...]}}
+        history_config (dict): The "history" settings from chat_config.yaml (max_chars, compact_to, summarize_dropped)
+        history_start (int): Conversation index of the oldest turn kept by the previous request (1 if none were dropped)
+
+    Returns:
+        messages (list): The messages to send to the LM
+        history_start (int): Conversation index of the oldest turn kept, to pass to the next request
+    """
+    system_message = conversation[0]
+    current_turn = conversation[-1]
+    history = []  # (conversation index, message)
+    for i in range(history_start, len(conversation) - 1):
+        message = conversation[i]
+        if i in turn_sources:
+            message = _strip_context(message, turn_sources[i])
+        history.append((i, message))
+
+    max_chars = history_config.get("max_chars")
+    used_chars = len(system_message["content"]) + len(current_turn["content"])
+    used_chars += sum(len(message["content"]) for _, message in history)
+    if max_chars is not None and used_chars > max_chars:
+        target_chars = max_chars * history_config.get("compact_to", 0.5)
+        while used_chars > target_chars and len(history) > 0:
+            used_chars -= len(history.pop(0)[1]["content"])
+            # Never start the kept history with an assistant reply
+            while len(history) > 0 and history[0][1]["role"] != "user":
+                used_chars -= len(history.pop(0)[1]["content"])
+        history_start = history[0][0] if len(history) > 0 else len(conversation) - 1
+        logging.info(
+            f"[*] ChatEngine: Dropped turns before conversation index {history_start} to fit history in {max_chars} characters"
+        )
+
+    messages = [message for _, message in history]
+    if history_start == 1 or not history_config.get("summarize_dropped", True):
+        return [system_message, *messages, current_turn], history_start
+
+    # The dropped turns only change when history_start does, so the summary is as stable as the history
+    dropped_prompts = [
+        turn_sources[i]["prompt"] if i in turn_sources else conversation[i]["content"]
+        for i in range(1, history_start)
+        if conversation[i]["role"] == "user"
+    ]
+    return [
+        system_message,
+        _summarize(dropped_prompts),
+        *messages,
+        current_turn,
+    ], history_start
+
+
+def _strip_context(message, sources):
+    """
+    Replaces an agent-modified user turn with the bare user prompt and its source list
+
+    Args:
+        message (dict): The user turn as it was sent to the LM
+        sources (dict): The turn's {"prompt": "{bare prompt}", "urls": [...]}
+
+    Returns:
+        message (dict): The stripped user turn
+    """
+    urls = ", ".join(sources["urls"])
+    return {
+        "role": message["role"],
+        "content": f"{sources['prompt']}\n\n(Web sources: {urls})",
+    }
+
+
+def _summarize(dropped_prompts):
+    """
+    Builds the one-line note listing the prompts of dropped turns
+
+    Args:
+        dropped_prompts (list): The dropped user prompts, oldest first
+
+    Returns:
+        summary (dict): A system message listing the last 10 dropped prompts
+    """
+    return {
+        "role": "system",
+        "content": "Earlier in this conversation the user asked: "
+        + "; ".join(prompt[:200] for prompt in dropped_prompts[-10:]),
+    }
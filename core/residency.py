@@ -0,0 +1,146 @@
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+from core.clients import get_ollama_client
+
+
+class ResidencyManager:
+    """
+    Loads the configured models into ollama in the background, so the first turn does not pay the model load time
+
+    Models are loaded one at a time in the order they are queued, with the same `options` and `keep_alive` the real
+    calls use (ollama reloads a model when its context size changes). After each load the models still resident on
+    the host are checked, and models evicting each other are reported.
+    """
+
+    def __init__(self, chat_config=None):
+        """
+        Constructor to read the warm-up setting and start with an empty load queue
+
+        Args:
+            chat_config (dict, default=None): The chat configuration, read from core/chat_config.yaml if not given
+        """
+        if chat_config is None:
+            config_data_path = Path(__file__).resolve().parent / "chat_config.yaml"
+            with config_data_path.open("r") as f:
+                chat_config = yaml.safe_load(f)
+        self.chat_config = chat_config
+        self.warm_up = chat_config.get("residency", {}).get("warm_up", True)
+        self.loaded = {}  # (host, model) -> seconds the load took
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def preload(self, host, model, keep_alive=None, options=None, pool_config=None):
+        """
+        Mutator function to queue a model for loading (models already queued are skipped)
+
+        Args:
+            host (str): The ollama host URL
+            model (str): The model name
+            keep_alive (str|int, default=None): How long ollama keeps the model loaded after its last call (e.g. "30m", -1 for forever)
+            options (dict, default=None): The ollama options the model is called with (e.g. num_ctx)
+            pool_config (dict, default=None): The connection pool settings the model's callers use for the host
+        """
+        if not self.warm_up or not host or not model:
+            return
+        load_options = (
+            {"num_ctx": options["num_ctx"]}
+            if options and "num_ctx" in options
+            else None
+        )
+        key = (host, model, repr(load_options))
+        with self._lock:
+            if key in self._queued:
+                return
+            if any((host, model) == queued[:2] for queued in self._queued):
+                logging.warning(
+                    f"[-] Residency: {model} is configured with different num_ctx values, ollama reloads it whenever the context size changes"
+                )
+            self._queued.add(key)
+            self._queue.put((host, model, keep_alive, load_options, pool_config))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def preload_chat_model(self):
+        """Mutator function to queue the chat engine's model"""
+        engine_config = self.chat_config["chat_engine"]
+        self.preload(
+            engine_config["host"],
+            engine_config["model"],
+            engine_config.get("keep_alive"),
+            engine_config.get("options"),
+            engine_config.get("connection_pool"),
+        )
+
+    def preload_tools(self, agent_config, tools=None):
+        """
+        Mutator function to queue the models of an agent's tools
+
+        Args:
+            agent_config (dict): The agent's configuration values, including tool settings
+            tools (list, default=None): Names of the tools to load (e.g. from `WebSearchAgent.active_tools`), every configured tool when None
+        """
+        for tool, tool_config in agent_config.get("tools", {}).items():
+            if tools is not None and tool not in tools:
+                continue
+            self.preload(
+                tool_config.get("host"),
+                tool_config.get("model"),
+                tool_config.get("keep_alive"),
+                tool_config.get("options"),
+                agent_config.get("connection_pool", {}).get("ollama"),
+            )
+
+    def wait(self):
+        """Blocks until every queued model has been loaded (or failed to load)"""
+        self._queue.join()
+
+    def _run(self):
+        """Background thread loading queued models"""
+        while True:
+            host, model, keep_alive, options, pool_config = self._queue.get()
+            try:
+                self._load(host, model, keep_alive, options, pool_config)
+            except Exception as e:
+                logging.warning(f"[-] Residency: Could not load {model} - {e}")
+            finally:
+                self._queue.task_done()
+
+    def _load(self, host, model, keep_alive, options, pool_config):
+        """
+        Loads one model, an empty prompt makes ollama load the model without generating anything
+
+        Args:
+            host (str): The ollama host URL
+            model (str): The model name
+            keep_alive (str|int): How long ollama keeps the model loaded after its last call
+            options (dict): The load-time ollama options (num_ctx)
+            pool_config (dict): The connection pool settings for the host
+        """
+        client = get_ollama_client(host, pool_config)
+        start_time = time.perf_counter()
+        client.generate(model=model, prompt="", keep_alive=keep_alive, options=options)
+        seconds = time.perf_counter() - start_time
+        self.loaded[(host, model)] = seconds
+        logging.warning(f"[+] Residency: {model} ready on {host} in {seconds:.1f}s")
+
+        resident = {running.model for running in client.ps().models}
+        evicted = [
+            loaded_model
+            for loaded_host, loaded_model in self.loaded
+            if loaded_host == host and loaded_model not in resident
+        ]
+        if len(evicted) > 0:
+            logging.warning(
+                f"[-] Residency: Loading {model} evicted {', '.join(evicted)}, the models do not fit in memory together (try a smaller num_ctx or one shared model)"
+            )
+            for evicted_model in evicted:
+                self.loaded.pop((host, evicted_model))
@@ -0,0 +1,277 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Timing fields ollama returns with a finished response (durations are in nanoseconds)
+OLLAMA_FIELDS = (
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+    "load_duration",
+)
+
+# Relative JSON-lines paths are resolved from the repo root
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_tracing_config = {"enabled": False}
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+# Aggregated metrics for the Prometheus endpoint, keyed by stage name
+_metrics_lock = threading.Lock()
+_stage_metrics = {}
+_turn_metrics = {"count": 0, "seconds": 0.0, "ttft_count": 0, "ttft_seconds": 0.0}
+
+
+class Trace:
+    """
+    The spans recorded for one conversation turn
+    """
+
+    def __init__(self):
+        """Constructor to start the turn clock"""
+        self.turn_id = uuid.uuid4().hex
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        """
+        Mutator function to record a finished span (spans may finish on worker threads)
+
+        Args:
+            span (dict): The finished span
+        """
+        with self._lock:
+            self.spans.append(span)
+
+
+def configure_tracing(tracing_config):
+    """
+    Mutator function to set the process-wide tracing settings
+
+    Args:
+        tracing_config (dict): The "tracing" settings from chat_config.yaml (enabled, jsonl_path, metrics_port)
+    """
+    global _tracing_config
+    _tracing_config = tracing_config or {"enabled": False}
+
+
+def tracing_enabled():
+    """
+    Accessor function for whether tracing is on
+
+    Returns:
+        enabled (bool): True if turns are traced
+    """
+    return _tracing_config.get("enabled", False)
+
+
+def start_turn():
+    """
+    Starts tracing a conversation turn in the current context (thread or asyncio task)
+
+    Returns:
+        trace (Trace): The new trace, or None when tracing is disabled
+    """
+    if not tracing_enabled():
+        return None
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Times a stage of the current turn
+
+    Yields a dictionary that the stage can add attributes to (e.g. with `record_ollama`). Outside a traced turn the
+    dictionary is simply discarded.
+
+    Args:
+        name (str): The stage name (e.g. "decide_to_search", "fetch")
+        **attributes: Extra attributes to record (e.g. url)
+    """
+    trace = _current_trace.get()
+    record = {"name": name, **attributes}
+    if trace is None:
+        yield record
+        return
+
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        ended = time.perf_counter()
+        record["start_ms"] = round(1000 * (started - trace.started), 3)
+        record["duration_ms"] = round(1000 * (ended - started), 3)
+        trace.add(record)
+        _record_stage(record)
+
+
+def record_ollama(record, response):
+    """
+    Copies the ollama timing fields of a finished response into a span
+
+    Args:
+        record (dict): The span yielded by `span`
+        response (ChatResponse): The (final chunk of the) ollama response
+    """
+    for field in OLLAMA_FIELDS:
+        value = response.get(field)
+        if value is not None:
+            record[field] = value
+
+
+def finish_turn(trace):
+    """
+    Finishes a turn's trace, writing it to the JSON-lines file and the aggregated metrics
+
+    Args:
+        trace (Trace): The trace returned by `start_turn` (ignored if None)
+    """
+    if trace is None:
+        return
+    _current_trace.set(None)
+    duration = time.perf_counter() - trace.started
+    ttft = next(
+        (
+            record["ttft_ms"]
+            for record in trace.spans
+            if record["name"] == "generate" and "ttft_ms" in record
+        ),
+        None,
+    )
+    with _metrics_lock:
+        _turn_metrics["count"] += 1
+        _turn_metrics["seconds"] += duration
+        if ttft is not None:
+            _turn_metrics["ttft_count"] += 1
+            _turn_metrics["ttft_seconds"] += ttft / 1000
+
+    jsonl_path = _tracing_config.get("jsonl_path")
+    if jsonl_path:
+        line = json.dumps(
+            {
+                "turn_id": trace.turn_id,
+                "timestamp": trace.timestamp,
+                "duration_ms": round(1000 * duration, 3),
+                "spans": sorted(trace.spans, key=lambda record: record["start_ms"]),
+            }
+        )
+        with _metrics_lock, (REPO_ROOT / jsonl_path).open("a") as f:
+            f.write(line + "\n")
+    logging.info(
+        f"[*] Tracing: Turn {trace.turn_id} took {1000 * duration:.1f}ms over {len(trace.spans)} spans"
+    )
+
+
+def _record_stage(record):
+    """
+    Adds a finished span to the aggregated per-stage metrics
+
+    Args:
+        record (dict): The finished span
+    """
+    with _metrics_lock:
+        metrics = _stage_metrics.setdefault(
+            record["name"],
+            {"count": 0, "seconds": 0.0, **{field: 0 for field in OLLAMA_FIELDS}},
+        )
+        metrics["count"] += 1
+        metrics["seconds"] += record["duration_ms"] / 1000
+        for field in OLLAMA_FIELDS:
+            metrics[field] += record.get(field, 0)
+
+
+def render_prometheus():
+    """
+    Renders the aggregated metrics in the Prometheus text exposition format
+
+    Returns:
+        text (str): The metrics page
+    """
+    with _metrics_lock:
+        stages = {name: dict(metrics) for name, metrics in _stage_metrics.items()}
+        turns = dict(_turn_metrics)
+
+    lines = [
+        "# HELP littleagents_turns_total Conversation turns traced.",
+        "# TYPE littleagents_turns_total counter",
+        f"littleagents_turns_total {turns['count']}",
+        "# HELP littleagents_turn_seconds_total Wall time of traced turns.",
+        "# TYPE littleagents_turn_seconds_total counter",
+        f"littleagents_turn_seconds_total {turns['seconds']:.6f}",
+        "# HELP littleagents_time_to_first_token_seconds Time to the first response token.",
+        "# TYPE littleagents_time_to_first_token_seconds summary",
+        f"littleagents_time_to_first_token_seconds_count {turns['ttft_count']}",
+        f"littleagents_time_to_first_token_seconds_sum {turns['ttft_seconds']:.6f}",
+        "# HELP littleagents_stage_seconds Wall time per turn stage.",
+        "# TYPE littleagents_stage_seconds summary",
+    ]
+    for name, metrics in sorted(stages.items()):
+        lines.append(
+            f'littleagents_stage_seconds_count{{stage="{name}"}} {metrics["count"]}'
+        )
+        lines.append(
+            f'littleagents_stage_seconds_sum{{stage="{name}"}} {metrics["seconds"]:.6f}'
+        )
+
+    ollama_metrics = [
+        ("prompt_eval_count", "ollama_prompt_eval_tokens_total", 1),
+        ("eval_count", "ollama_eval_tokens_total", 1),
+        ("prompt_eval_duration", "ollama_prompt_eval_seconds_total", 1e-9),
+        ("eval_duration", "ollama_eval_seconds_total", 1e-9),
+        ("load_duration", "ollama_load_seconds_total", 1e-9),
+    ]
+    for field, metric, scale in ollama_metrics:
+        lines.append(f"# TYPE littleagents_{metric} counter")
+        for name, metrics in sorted(stages.items()):
+            if metrics[field]:
+                lines.append(
+                    f'littleagents_{metric}{{stage="{name}"}} {metrics[field] * scale:g}'
+                )
+    return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serves `render_prometheus` at http://{host}:{port}/metrics from a background thread
+
+    Args:
+        port (int): The port to listen on
+        host (str, default="127.0.0.1"): The address to listen on
+
+    Returns:
+        server (ThreadingHTTPServer): The running server
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.warning(
+        f"[+] Tracing: Serving metrics on http://{host}:{server.server_address[1]}/metrics"
+    )
+    return server
@@ -1,5 +1,7 @@
 from agents.websearch.agent import WebSearchAgent
 from core.chat_engine import ChatEngine
+from core.residency import ResidencyManager
+from core.tracing import start_metrics_server
 
 
 def setup_agents():
@@ -13,21 +15,60 @@ def setup_agents():
         websearch_mode = input("[>] Set WebSearchAgent mode to 'conditional'> (Y/n): ")
         if "n" not in websearch_mode:
             agents[0].set_agent_mode("conditional")
+        else:
+            websearch_mode = input(
+                "[>] Set WebSearchAgent mode to 'snippet' (faster, search snippets only)? (y/N): "
+            )
+            if "y" in websearch_mode.lower():
+                agents[0].set_agent_mode("snippet")
     return agents
 
 
+def print_domain_health(agents):
+    """Helper function to print the per-domain scrape statistics of the agents that track them"""
+    for agent in agents:
+        if not hasattr(agent, "domain_health_report"):
+            continue
+        report = agent.domain_health_report()
+        if report is None:
+            print("\n[#] Domain health is disabled in agent_config.yaml\n")
+            continue
+        print(f"\n[#] {agent.name} domain health ({len(report)} domains):")
+        print(
+            f"{'domain':<40} {'fetches':>7} {'success':>7} {'median s':>8} {'median chars':>12}  status"
+        )
+        for row in report:
+            print(
+                f"{row['domain'][:40]:<40} {row['fetches']:>7} {row['success_rate']:>7.0%} {row['median_latency']:>8.2f} {row['median_text_len']:>12}  {row['status']}"
+            )
+        print()
+
+
 def main():
     """Looped function handles user I/O with the model until program exit"""
+    # Load the chat model while the setup questions are answered, then the tool models of the chosen agents
+    residency = ResidencyManager()
+    residency.preload_chat_model()
     agents = setup_agents()
+    for agent in agents:
+        residency.preload_tools(agent.agent_config, agent.active_tools())
     if len(agents) > 0:
         engine = ChatEngine(agents)
     else:
         engine = ChatEngine()
 
+    if engine.tracing_config.get("enabled") and engine.tracing_config.get(
+        "metrics_port"
+    ):
+        start_metrics_server(engine.tracing_config["metrics_port"])
+
     while True:
         user_prompt = input("[>] User: ")
         if user_prompt.lower().strip() == "exit":
             return
+        if user_prompt.lower().strip() == "/health":
+            print_domain_health(agents)
+            continue
 
         for i, chunk in enumerate(engine.process_message(user_prompt)):
             if i == 0:
@@ -0,0 +1,513 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import yaml
+
+from agents.websearch.agent import WebSearchAgent
+from core.chat_engine import ChatEngine
+from core.residency import ResidencyManager
+from core.tracing import render_prometheus
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class Session:
+    """
+    A single conversation hosted by the server
+    """
+
+    def __init__(self, engine):
+        """
+        Constructor to wrap a chat engine with the bookkeeping the session store needs
+
+        Args:
+            engine (ChatEngine): The session's chat engine
+        """
+        self.engine = engine
+        self.last_used = time.monotonic()
+        self.busy = False  # True while a message is being generated
+
+
+class SessionStore:
+    """
+    Bounded store of sessions, evicting sessions that are idle too long or least recently used when full
+    """
+
+    def __init__(self, max_sessions, idle_timeout):
+        """
+        Constructor to set store limits
+
+        Args:
+            max_sessions (int): Maximum number of live sessions
+            idle_timeout (int): Seconds a session may be unused before it is evicted
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions = OrderedDict()
+
+    def create(self, engine):
+        """
+        Mutator function to add a session, evicting the least recently used idle session if the store is full
+
+        Args:
+            engine (ChatEngine): The new session's chat engine
+
+        Returns:
+            session_id (str): The new session's id, or None if the store is full of busy sessions
+        """
+        if len(self.sessions) >= self.max_sessions:
+            idle = [sid for sid, session in self.sessions.items() if not session.busy]
+            if len(idle) == 0:
+                return None
+            self.sessions.pop(idle[0])
+            logging.warning(
+                f"[+] Server: Evicted least recently used session {idle[0]}"
+            )
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = Session(engine)
+        return session_id
+
+    def has_capacity(self):
+        """
+        Accessor function for whether a new session can be created
+
+        Returns:
+            has_capacity (bool): True if the store is below `max_sessions` or has an idle session to evict
+        """
+        return len(self.sessions) < self.max_sessions or any(
+            not session.busy for session in self.sessions.values()
+        )
+
+    def get(self, session_id):
+        """
+        Accessor function for a session, marking it as recently used
+
+        Args:
+            session_id (str): The session id
+
+        Returns:
+            session (Session): The session, or None if it does not exist
+        """
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id):
+        """
+        Mutator function to remove a session
+
+        Args:
+            session_id (str): The session id
+
+        Returns:
+            deleted (bool): True if the session existed
+        """
+        return self.sessions.pop(session_id, None) is not None
+
+    def evict_idle(self):
+        """Mutator function to remove sessions idle for longer than `idle_timeout`"""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [
+            sid
+            for sid, session in self.sessions.items()
+            if not session.busy and session.last_used < cutoff
+        ]
+        for session_id in expired:
+            self.sessions.pop(session_id)
+        if len(expired) > 0:
+            logging.warning(f"[+] Server: Evicted {len(expired)} idle sessions")
+
+
+class ChatServer:
+    """
+    HTTP server hosting many chat sessions in one process, streaming responses as Server-Sent Events
+
+    Routes:
+        GET /health: server status
+        GET /metrics: per-stage latency and ollama timing metrics in Prometheus text format (when tracing is enabled)
+        POST /sessions: create a session, JSON body {"websearch": bool, "mode": "explicit" | "conditional" | "snippet"}
+        DELETE /sessions/{id}: end a session
+        POST /sessions/{id}/messages: send a message, JSON body {"prompt": str}, streams "token", "sources" and "done" events
+    """
+
+    def __init__(self, server_config):
+        """
+        Constructor to set server limits
+
+        Args:
+            server_config (dict): The "server" settings from chat_config.yaml
+        """
+        self.host = server_config["host"]
+        self.port = server_config["port"]
+        self.store = SessionStore(
+            server_config["max_sessions"], server_config["session_idle_timeout"]
+        )
+        # At most `max_concurrent_generations` messages are processed at once, and at most
+        # `max_queued_generations` more may wait for a slot before new messages are refused
+        self.generation_slots = asyncio.Semaphore(
+            server_config["max_concurrent_generations"]
+        )
+        self.max_queued = server_config["max_queued_generations"]
+        self.queued = 0
+
+    async def serve(self):
+        """Runs the server until cancelled"""
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        eviction = asyncio.create_task(self._evict_idle_sessions())
+        logging.critical(f"[+] Server: Listening on http://{self.host}:{self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            eviction.cancel()
+
+    async def _evict_idle_sessions(self):
+        """Background task evicting idle sessions"""
+        while True:
+            await asyncio.sleep(max(1, self.store.idle_timeout / 4))
+            self.store.evict_idle()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Handles one HTTP request per connection
+
+        Args:
+            reader (asyncio.StreamReader): The connection's reader
+            writer (asyncio.StreamWriter): The connection's writer
+        """
+        try:
+            method, path, body = await self._read_request(reader)
+            await self.route(method, path, body, writer)
+        except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            await self._send_json(writer, 400, {"error": "malformed request"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            # A failing handler still answers, instead of dropping the connection without a response
+            logging.warning(f"[-] Server: Request failed - {e!r}")
+            try:
+                await self._send_json(writer, 500, {"error": "internal server error"})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body, writer):
+        """
+        Dispatches a request to its handler
+
+        Args:
+            method (str): The HTTP method
+            path (str): The request path
+            body (bytes): The request body
+            writer (asyncio.StreamWriter): The connection's writer
+        """
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts == ["health"] and method == "GET":
+            await self._send_json(
+                writer,
+                200,
+                {
+                    "sessions": len(self.store.sessions),
+                    "queued_generations": self.queued,
+                },
+            )
+        elif parts == ["metrics"] and method == "GET":
+            body = render_prometheus().encode("utf-8")
+            writer.write(
+                self._head(
+                    200,
+                    {
+                        "Content-Type": "text/plain; version=0.0.4",
+                        "Content-Length": len(body),
+                    },
+                )
+                + body
+            )
+            await writer.drain()
+        elif parts == ["sessions"] and method == "POST":
+            await self.create_session(self._json_object(body), writer)
+        elif len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+            deleted = self.store.delete(parts[1])
+            await self._send_json(writer, 200 if deleted else 404, {"deleted": deleted})
+        elif len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages":
+            if method != "POST":
+                await self._send_json(writer, 405, {"error": "method not allowed"})
+                return
+            await self.send_message(parts[1], self._json_object(body), writer)
+        else:
+            await self._send_json(writer, 404, {"error": "not found"})
+
+    @staticmethod
+    def _json_object(body):
+        """
+        Parses a request body that must be a JSON object
+
+        Args:
+            body (bytes): The request body (empty for {})
+
+        Returns:
+            options (dict): The parsed object, raises ValueError (a 400 response) for anything else
+        """
+        options = json.loads(body or b"{}")
+        if not isinstance(options, dict):
+            raise ValueError("request body is not a JSON object")
+        return options
+
+    async def create_session(self, options, writer):
+        """
+        Creates a session with its own chat engine and agents
+
+        Args:
+            options (dict): {"websearch": bool, "mode": "explicit" | "conditional" | "snippet"}
+            writer (asyncio.StreamWriter): The connection's writer
+        """
+        if not self.store.has_capacity():
+            await self._send_json(writer, 503, {"error": "too many active sessions"})
+            return
+        # Loading configs and opening caches is blocking I/O, keep it off the event loop
+        engine = await asyncio.to_thread(self._build_engine, options)
+        session_id = self.store.create(engine)
+        if session_id is None:
+            await self._send_json(writer, 503, {"error": "too many active sessions"})
+            return
+        await self._send_json(writer, 201, {"session_id": session_id})
+
+    @staticmethod
+    def _build_engine(options):
+        """
+        Builds a session's chat engine and agents
+
+        Args:
+            options (dict): {"websearch": bool, "mode": "explicit" | "conditional" | "snippet"}
+
+        Returns:
+            engine (ChatEngine): The new session's chat engine
+        """
+        agents = []
+        if options.get("websearch", True):
+            websearch_agent = WebSearchAgent()
+            if "mode" in options:
+                websearch_agent.set_agent_mode(options["mode"])
+            agents.append(websearch_agent)
+        return ChatEngine(agents)
+
+    async def send_message(self, session_id, message, writer):
+        """
+        Processes a message and streams the response as Server-Sent Events
+
+        Args:
+            session_id (str): The session id
+            message (dict): {"prompt": str}
+            writer (asyncio.StreamWriter): The connection's writer
+        """
+        session = self.store.get(session_id)
+        if session is None:
+            await self._send_json(writer, 404, {"error": "unknown session"})
+            return
+        if not message.get("prompt"):
+            await self._send_json(writer, 400, {"error": "missing prompt"})
+            return
+        if session.busy:
+            await self._send_json(writer, 409, {"error": "session is busy"})
+            return
+        if self.generation_slots.locked() and self.queued >= self.max_queued:
+            await self._send_json(
+                writer, 503, {"error": "server busy"}, {"Retry-After": "5"}
+            )
+            return
+
+        session.busy = True
+        self.queued += 1
+        slot_acquired = False
+        try:
+            async with self.generation_slots:
+                self.queued -= 1
+                slot_acquired = True
+                writer.write(
+                    self._head(
+                        200,
+                        {
+                            "Content-Type": "text/event-stream",
+                            "Cache-Control": "no-cache",
+                        },
+                    )
+                )
+                response = None
+                try:
+                    response = await session.engine.async_process_message(
+                        message["prompt"]
+                    )
+                    async for chunk in response:
+                        writer.write(self._event("token", {"content": chunk}))
+                        # Backpressure: stop generating until a slow client has read the stream
+                        await writer.drain()
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"[-] Server: Generation failed - {e}")
+                    writer.write(self._event("error", {"error": str(e)}))
+                    await writer.drain()
+                    return
+                finally:
+                    # Closes the ollama stream now, and drops the user turn if the reply did not finish
+                    if response is not None:
+                        await response.aclose()
+
+                engine = session.engine
+                if engine.last_search_used:
+                    writer.write(
+                        self._event("sources", {"urls": engine.last_search_urls})
+                    )
+                writer.write(
+                    self._event(
+                        "done", {"prompt_eval_count": engine.last_prompt_eval_count}
+                    )
+                )
+                await writer.drain()
+        finally:
+            if not slot_acquired:
+                self.queued -= 1
+            session.busy = False
+            session.last_used = time.monotonic()
+
+    async def _read_request(self, reader):
+        """
+        Reads an HTTP request
+
+        Args:
+            reader (asyncio.StreamReader): The connection's reader
+
+        Returns:
+            method (str): The HTTP method
+            path (str): The request path
+            body (bytes): The request body
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method.upper(), path, body
+
+    def _head(self, status, headers):
+        """
+        Builds an HTTP response head
+
+        Args:
+            status (int): The HTTP status code
+            headers (dict): The response headers
+
+        Returns:
+            head (bytes): The status line and headers
+        """
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        lines.append("Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    def _event(self, event, data):
+        """
+        Builds a Server-Sent Event
+
+        Args:
+            event (str): The event name
+            data (dict): The JSON event data
+
+        Returns:
+            event (bytes): The encoded event
+        """
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+    async def _send_json(self, writer, status, data, headers=None):
+        """
+        Sends a JSON response
+
+        Args:
+            writer (asyncio.StreamWriter): The connection's writer
+            status (int): The HTTP status code
+            data (dict): The JSON response body
+            headers (dict, default=None): Extra response headers
+        """
+        body = json.dumps(data).encode("utf-8")
+        writer.write(
+            self._head(
+                status,
+                {
+                    "Content-Type": "application/json",
+                    "Content-Length": len(body),
+                    **(headers or {}),
+                },
+            )
+            + body
+        )
+        await writer.drain()
+
+
+def main(host=None, port=None):
+    """
+    Starts the multi-session HTTP/SSE server
+
+    Args:
+        host (str, default=None): Overrides the configured listen address
+        port (int, default=None): Overrides the configured port
+    """
+    config_data_path = (
+        Path(__file__).resolve().parent.parent / "core" / "chat_config.yaml"
+    )
+    with config_data_path.open("r") as f:
+        server_config = yaml.safe_load(f).get("server", {})
+
+    server_config = {
+        "host": "127.0.0.1",
+        "port": 8080,
+        "max_sessions": 100,
+        "session_idle_timeout": 1800,
+        "max_concurrent_generations": 2,
+        "max_queued_generations": 16,
+        **server_config,
+    }
+    if host is not None:
+        server_config["host"] = host
+    if port is not None:
+        server_config["port"] = port
+
+    residency = ResidencyManager()
+    residency.preload_chat_model()
+    # Sessions start in the configured agent mode, load the tools it calls
+    websearch_agent = WebSearchAgent()
+    residency.preload_tools(
+        websearch_agent.agent_config, websearch_agent.active_tools()
+    )
+
+    try:
+        asyncio.run(ChatServer(server_config).serve())
+    except KeyboardInterrupt:
+        return
@@ -12,6 +12,13 @@ if __name__ == "__main__":
         default=0,
         help="Increase verbosity (-v, -vv, -vvv)",
     )
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Serve many sessions over HTTP/SSE instead of running the CLI",
+    )
+    parser.add_argument("--host", help="Server listen address (overrides config)")
+    parser.add_argument("--port", type=int, help="Server port (overrides config)")
     args = parser.parse_args()
 
     # Levels not actually used for error checking
@@ -24,6 +31,11 @@ if __name__ == "__main__":
         level = logging.DEBUG  # Print all agent functions and prompts
 
     logging.basicConfig(level=level, format="%(message)s")
-    from interfaces.cli import main
+    if args.server:
+        from interfaces.server import main
+
+        main(args.host, args.port)
+    else:
+        from interfaces.cli import main
 
-    main()
+        main()